@@ -3,8 +3,9 @@ import logging
 import os
 import time
 import multiprocessing
+import shlex
 from typing import List
-from .files_scanner import scan_for_files
+from .files_scanner import scan_for_baseline_files, scan_for_files
 from .programs_reader import read_programs_sets
 from .command_line_app_utils import (
     configure_arg_parser,
@@ -17,7 +18,9 @@ from .command_line_app_utils import (
 from pl.forseti.c_code.ccode_parser import CCodeParser
 from pl.forseti.c_code.ccode_filter import CCodeFilter
 from pl.forseti.code_tokenizer import CodeTokenizer
+from pl.forseti.tokenization_cache import TokenizationCache
 from pl.forseti.detection_engine import DetectionEngine
+from pl.forseti.corpus import Corpus
 from pl.forseti.comparison_results_processor import ComparisonResultsProcessor
 from pl.forseti.report_generation.report_generator import ReportGenerator
 
@@ -34,6 +37,22 @@ class CommandLineApp:
             help="Paths to programs which will be checked.",
             required=False,
         )
+        program_sources_options.add_argument(
+            "--baseline_paths",
+            nargs="+",
+            action="append",
+            help="""Paths to files or directories of baseline programs (e.g. starter code of assignment). Code matching them is excluded from detection.
+                    Files given together form one program, directories are scanned like --paths directory (using --file_patterns).""",
+            required=False,
+        )
+        program_sources_options.add_argument(
+            "--corpus_path",
+            type=str,
+            default="",
+            help="""Path to directory of persistent corpus. Programs from --paths are added to it and all programs of the corpus are compared.
+                    Results of pairs compared in previous runs are reused, so only pairs with new programs are compared.""",
+            required=False,
+        )
         program_sources_options.add_argument(
             "--file_patterns",
             nargs="+",
@@ -61,33 +80,64 @@ class CommandLineApp:
             return
         if -1 == self.__args.n_processors:
             self.__args.n_processors = multiprocessing.cpu_count() - 1
-        self.__validate_paths__(filepaths_sets)
+        if not self.__args.corpus_path:
+            self.__validate_paths__(filepaths_sets)
 
         programs_sets = read_programs_sets(filepaths_sets)
 
         ccode_filter_config = args_to_ccode_filtration_config(self.__args)
         tokenization_start_time = time.process_time()
-        tokenized_programs = CodeTokenizer(
-            CCodeParser(CCodeFilter(ccode_filter_config)),
+        tokenization_cache = None
+        if self.__args.tokenization_cache_path:
+            tokenization_cache = TokenizationCache(self.__args.tokenization_cache_path, self.__args.tokenization_cache_size)
+        code_tokenizer = CodeTokenizer(
+            CCodeParser(CCodeFilter(ccode_filter_config), shlex.split(self.__args.clang_args), self.__args.use_precompiled_headers),
             n_processors=self.__args.n_processors,
-        ).parse_programs(programs_sets)
-        if len(tokenized_programs) <= 1:
+            tokenization_cache=tokenization_cache,
+        )
+        corpus = None
+        tokenized_programs = []
+        if self.__args.corpus_path:
+            corpus = Corpus(self.__args.corpus_path)
+            corpus.add_programs(programs_sets, code_tokenizer)
+            number_of_programs = len(corpus.authors)
+        else:
+            tokenized_programs = code_tokenizer.parse_programs(programs_sets)
+            number_of_programs = len(tokenized_programs)
+        if number_of_programs <= 1:
             raise Exception("There are no programs which can be parsed and compared.")
+        baseline_programs = []
+        if self.__args.baseline_paths:
+            baseline_programs = code_tokenizer.parse_programs(
+                read_programs_sets(scan_for_baseline_files(self.__args.baseline_paths, self.__args.file_patterns))
+            )
+            if not baseline_programs:
+                raise Exception("No baseline programs found, please ensure that you pass valid arguments for --baseline_paths option.")
 
+        if tokenization_cache is not None:
+            tokenization_cache.close()
         tokenization_end_time = time.process_time()
 
         detection_config = args_to_detection_config(self.__args)
+        report_generation_config = args_to_report_generation_config(self.__args)
+        comparison_results_processor_config = args_to_comparison_results_processor_config(self.__args)
+        # Results are processed as soon as they are computed, so they do not have to be kept in memory all at once.
+        comparison_results_processor = ComparisonResultsProcessor(None, comparison_results_processor_config)
         detection_start_time = time.process_time()
-        raw_comparison_results = DetectionEngine().analyze(
-            tokenized_programs,
-            detection_config,
-            self.__args.selected_programs_to_compare,
-        )
+        if corpus is not None:
+            comparison_results = corpus.analyze_stream(detection_config, self.__args.selected_programs_to_compare, baseline_programs)
+        else:
+            comparison_results = DetectionEngine().analyze_stream(
+                tokenized_programs,
+                detection_config,
+                self.__args.selected_programs_to_compare,
+                baseline_programs,
+            )
+        for comparison_result in comparison_results:
+            comparison_results_processor.add(comparison_result)
+        comparison_results_processor.finalize()
         detection_end_time = time.process_time()
 
-        report_generation_config = args_to_report_generation_config(self.__args)
-        comparison_results_processor_config = args_to_comparison_results_processor_config(self.__args)
-        comparison_results_processor = ComparisonResultsProcessor(raw_comparison_results, comparison_results_processor_config)
         report_generator = ReportGenerator(comparison_results_processor, report_generation_config)
         report_generator.generate_reports()
 
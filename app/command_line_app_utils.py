@@ -92,6 +92,38 @@ def configure_arg_parser(parser):
         default=True,
         help="Defines, if parent expression should be filtered. Parent expression for example is int var = (x + y).",
     )
+    processing_options.add_argument(
+        "--clang_args",
+        type=str,
+        default="",
+        required=False,
+        help="""Extra arguments passed to libclang when programs are parsed, e.g. --clang_args="-I include -D SIZE=10".
+                                    They are added after default ones (-D NULL=0 -w).""",
+    )
+    processing_options.add_argument(
+        "--use_precompiled_headers",
+        type=str2bool,
+        nargs="?",
+        const=True,
+        required=False,
+        default=False,
+        help="""Defines, if system includes common to many files are precompiled once and reused when files are parsed.
+                                    Files with different includes are parsed as before.""",
+    )
+    processing_options.add_argument(
+        "--tokenization_cache_path",
+        type=str,
+        default="",
+        required=False,
+        help="Path to SQLite database, in which tokens of parsed programs are cached between runs. By default tokens are not cached.",
+    )
+    processing_options.add_argument(
+        "--tokenization_cache_size",
+        type=int,
+        default=256 * 1024 * 1024,
+        required=False,
+        help="Maximal size (in bytes) of cached tokens. Least recently used programs are evicted, when it is exceeded.",
+    )
 
     report_generation_options = parser.add_argument_group("report generation configuration")
     report_generation_options.add_argument(
@@ -203,7 +235,77 @@ def configure_arg_parser(parser):
         default=-1,
         required=False,
     )
-    algorithm_options.add_argument("--ks_condition_value", type=float, default=0.95, required=False)
+    algorithm_options.add_argument(
+        "--gst_engine",
+        choices=["rkr", "suffix_array"],
+        default="rkr",
+        required=False,
+        help="""Defines greedy string tiling implementation: heuristic Running-Karp-Rabin (rkr) or exact one, based on suffix array,
+                which finds all matches once per comparison pair (suffix_array). The last pass of rkr searches for matches of its shortest
+                search length (between minimal_search_length and its double), so suffix_array also finds shorter tiles and its similarities
+                can be higher.""",
+    )
+    algorithm_options.add_argument(
+        "--hashing_method",
+        choices=["numpy", "rolling"],
+        default="numpy",
+        required=False,
+        help="Defines, how hashes of token windows are computed: vectorized, using numpy, or by pure Python rolling hash.",
+    )
+    algorithm_options.add_argument(
+        "--candidate_generation",
+        choices=["all_pairs", "minhash_lsh"],
+        default="all_pairs",
+        required=False,
+        help="""Defines, how comparison pairs are generated: all combinations of code units (all_pairs) or only code units,
+                which MinHash signatures collide in locality sensitive hashing (minhash_lsh). The latter is approximate, but much faster.""",
+    )
+    algorithm_options.add_argument("--lsh_bands", type=int, default=16, required=False, help="Number of LSH bands. More bands increase recall.")
+    algorithm_options.add_argument(
+        "--lsh_rows", type=int, default=4, required=False, help="Number of MinHash values in LSH band. More rows increase precision."
+    )
+    algorithm_options.add_argument("--minhash_kgram_length", type=int, default=4, required=False, help="Length of token kinds k-grams used by MinHash.")
+    algorithm_options.add_argument(
+        "--similarity_floor",
+        type=float,
+        default=-1,
+        required=False,
+        help="""If set, comparison of a pair is abandoned as soon as it cannot reach this similarity (2 * matched tokens / all tokens).
+                Such pair, like a pair with lower final similarity, is reported without any match. Value -1 disables it.""",
+    )
+    algorithm_options.add_argument(
+        "--minimal_fingerprints_overlap",
+        type=float,
+        default=-1,
+        required=False,
+        help="""If set, comparison pairs, which share smaller fraction of winnowing fingerprints (like in MOSS), are skipped before detection.
+                Value -1 disables it.""",
+    )
+    algorithm_options.add_argument("--winnowing_kgram_length", type=int, default=5, required=False, help="Length of token kinds k-grams used by winnowing.")
+    algorithm_options.add_argument(
+        "--winnowing_window_length", type=int, default=4, required=False, help="Number of consecutive k-grams, from which one fingerprint is selected."
+    )
+    algorithm_options.add_argument(
+        "--pair_results_cache_path",
+        type=str,
+        default="",
+        required=False,
+        help="Path to SQLite database, in which results of comparison pairs are cached between runs. By default results are not cached.",
+    )
+    algorithm_options.add_argument(
+        "--pair_results_cache_size",
+        type=int,
+        default=256 * 1024 * 1024,
+        required=False,
+        help="Maximal size (in bytes) of cached results. Least recently used results are evicted, when it is exceeded.",
+    )
+    algorithm_options.add_argument(
+        "--ks_condition_value",
+        type=float,
+        default=-1,
+        required=False,
+        help="If set, comparison pairs with lower cosine similarity of token kinds histograms are skipped. Value -1 disables it.",
+    )
     algorithm_options.add_argument("--selected_programs_to_compare", nargs="+", required=False, default=[])
 
 
@@ -233,6 +335,18 @@ def args_to_detection_config(args):
     config.max_number_of_differences_in_single_comparison_pair = args.max_number_of_differences_in_single_comparison_pair
     config.assign_functions_based_on_types = args.assign_functions_based_on_types
     config.ks_condition_value = args.ks_condition_value
+    config.hashing_method = args.hashing_method
+    config.gst_engine = args.gst_engine
+    config.similarity_floor = args.similarity_floor
+    config.candidate_generation = args.candidate_generation
+    config.lsh_bands = args.lsh_bands
+    config.lsh_rows = args.lsh_rows
+    config.minhash_kgram_length = args.minhash_kgram_length
+    config.minimal_fingerprints_overlap = args.minimal_fingerprints_overlap
+    config.winnowing_kgram_length = args.winnowing_kgram_length
+    config.winnowing_window_length = args.winnowing_window_length
+    config.pair_results_cache_path = args.pair_results_cache_path
+    config.pair_results_cache_size = args.pair_results_cache_size
     return config
 
 
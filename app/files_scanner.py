@@ -39,3 +39,21 @@ def scan_for_files(paths, patterns):
 
     validate_file_paths(scanned_paths)
     return scanned_paths
+
+
+def scan_for_baseline_files(paths, patterns):
+    """Every baseline path can be a file or a directory. Files of one --baseline_paths group form one program,
+    directories are scanned like a folder with sources (see scan_for_files)."""
+    scanned_paths = []
+    for group in paths:
+        files = []
+        for path in group:
+            if os.path.isdir(path):
+                scanned_paths.extend(scan_for_files([[path]], patterns))
+            else:
+                files.append(os.path.abspath(path))
+        if files:
+            scanned_paths.append(files)
+
+    validate_file_paths(scanned_paths)
+    return scanned_paths
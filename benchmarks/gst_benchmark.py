@@ -0,0 +1,76 @@
+"""Compares speed of greedy string tiling configurations on synthetic pairs of token sequences.
+
+Pairs are made from random token codes; the second sequence is a copy of the first one with some blocks of tokens replaced,
+so both short and long tiles are present - similarly to real plagiarism cases.
+
+Usage: python -m benchmarks.gst_benchmark --lengths 200 1000 5000 --repeats 5
+"""
+
+import argparse
+import time
+from typing import List, Tuple
+import numpy as np
+
+from pl.forseti.detection.gst import gst
+from pl.forseti.detection.prepared_sequence import PreparedSequence
+from pl.forseti.detection.suffix_array_gst import suffix_array_gst
+from pl.forseti.detection.tiles_manager import TilesManager
+
+
+def generate_pair(length: int, vocabulary_size: int, changed_blocks: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    generator = np.random.default_rng(seed)
+    tokens_a = generator.integers(0, vocabulary_size, length, dtype=np.int32)
+    tokens_b = tokens_a.copy()
+    for _ in range(changed_blocks):
+        begin = int(generator.integers(0, length))
+        block_length = int(generator.integers(1, 20))
+        tokens_b[begin : begin + block_length] = generator.integers(0, vocabulary_size, len(tokens_b[begin : begin + block_length]), dtype=np.int32)
+    return tokens_a, tokens_b
+
+
+def measure(
+    pairs: List[Tuple[np.ndarray, np.ndarray]], minimal_search_length: int, initial_search_length: int, engine: str = "rkr", **gst_options
+) -> Tuple[float, int]:
+    start_time = time.perf_counter()
+    matched_tokens = 0
+    for tokens_a, tokens_b in pairs:
+        if engine == "suffix_array":
+            tiles = suffix_array_gst(TilesManager(PreparedSequence(tokens_a)), TilesManager(PreparedSequence(tokens_b)), minimal_search_length)
+        else:
+            tiles = gst(
+                TilesManager(PreparedSequence(tokens_a)), TilesManager(PreparedSequence(tokens_b)), minimal_search_length, initial_search_length, **gst_options
+            )
+        matched_tokens += sum(tile["length"] for tile in tiles)
+    return time.perf_counter() - start_time, matched_tokens
+
+
+CONFIGURATIONS = {
+    "rolling hash": {"hashing_method": "rolling"},
+    "numpy hash": {"hashing_method": "numpy"},
+    "suffix array (exact)": {"engine": "suffix_array"},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Greedy string tiling benchmark")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[200, 1000, 5000])
+    parser.add_argument("--pairs", type=int, default=10, help="Number of pairs for every length.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--vocabulary_size", type=int, default=40)
+    parser.add_argument("--minimal_search_length", type=int, default=8)
+    parser.add_argument("--initial_search_length", type=int, default=20)
+    args = parser.parse_args()
+
+    for length in args.lengths:
+        pairs = [generate_pair(length, args.vocabulary_size, max(1, length // 50), seed) for seed in range(args.pairs)]
+        print(f"{args.pairs} pairs of {length} tokens:")
+        for name, gst_options in CONFIGURATIONS.items():
+            times = []
+            for _ in range(args.repeats):
+                elapsed, matched_tokens = measure(pairs, args.minimal_search_length, args.initial_search_length, **gst_options)
+                times.append(elapsed)
+            print(f"    {name:<24} best {min(times) * 1000:10.2f} ms    matched tokens {matched_tokens}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Compares time of parsing C files with libclang for different index and parse options configurations.
+
+By default a synthetic corpus of student-like programs is generated: every program includes common standard headers and has a few
+functions with loops, conditions and calls, so most of parse time is spent on headers - similarly to real submissions.
+Real programs can be used instead with --paths (every file is parsed separately). Extra libclang arguments can be passed with --clang_args
+(e.g. include directory of compiler builtin headers, if libclang does not find them).
+
+Usage: python -m benchmarks.parse_benchmark --programs 50 --repeats 3
+"""
+
+import argparse
+import functools
+import glob
+import os
+import random
+import shlex
+import tempfile
+import time
+from typing import List
+
+from clang.cindex import Index
+
+from pl.forseti.c_code.ccode_parser import DEFAULT_CLANG_ARGS, PARSE_OPTIONS, get_index
+from pl.forseti.c_code.precompiled_headers import PrecompiledHeaders
+
+HEADERS = ["stdio.h", "stdlib.h", "string.h", "math.h", "ctype.h", "stdbool.h"]
+
+FUNCTION_TEMPLATE = """
+int {name}(int *values, int size) {{
+    int result = 0;
+    for (int i = 0; i < size; i++) {{
+        if (values[i] % {modulo} == 0) {{
+            result += values[i] * {factor};
+        }} else {{
+            result -= (int)sqrt((double)abs(values[i]));
+        }}
+    }}
+    printf("%d\\n", result);
+    return result;
+}}
+"""
+
+MAIN_TEMPLATE = """
+int main(void) {{
+    int values[{size}];
+    for (int i = 0; i < {size}; i++) {{
+        values[i] = rand() % 100;
+    }}
+{calls}    return 0;
+}}
+"""
+
+
+def generate_program(seed: int, functions: int) -> str:
+    generator = random.Random(seed)
+    headers = generator.sample(HEADERS, k=generator.randint(3, len(HEADERS)))
+    # sqrt and abs are used by every function.
+    code = "".join(f"#include <{header}>\n" for header in sorted(set(headers) | {"math.h", "stdlib.h", "stdio.h"}))
+    names = [f"function_{seed}_{i}" for i in range(functions)]
+    for name in names:
+        code += FUNCTION_TEMPLATE.format(name=name, modulo=generator.randint(2, 9), factor=generator.randint(1, 5))
+    code += MAIN_TEMPLATE.format(size=generator.randint(10, 100), calls="".join(f"    {name}(values, {len(names)});\n" for name in names))
+    return code
+
+
+def generate_corpus(directory: str, programs: int, functions: int) -> List[str]:
+    filenames = []
+    for i in range(programs):
+        filename = os.path.join(directory, f"program_{i}.c")
+        with open(filename, "w") as file:
+            file.write(generate_program(i, functions))
+        filenames.append(filename)
+    return filenames
+
+
+def parse_with_index_per_file(filenames: List[str], clang_args: List[str]) -> None:
+    """Previous behaviour of CCodeParser: new index for every file and default parse options."""
+    for filename in filenames:
+        Index.create().parse(path=filename, args=["-D NULL=0"] + clang_args)
+
+
+def parse_with_shared_index(filenames: List[str], clang_args: List[str]) -> None:
+    for filename in filenames:
+        get_index().parse(path=filename, args=DEFAULT_CLANG_ARGS + clang_args, options=PARSE_OPTIONS)
+
+
+def parse_with_precompiled_headers(filenames: List[str], clang_args: List[str]) -> None:
+    """Time of building precompiled headers is included."""
+    precompiled_headers = PrecompiledHeaders(DEFAULT_CLANG_ARGS + clang_args, PARSE_OPTIONS, functools.partial(get_index, True))
+    sources = []
+    for filename in filenames:
+        with open(filename, "r", errors="replace") as file:
+            sources.append((filename, file.read()))
+    precompiled_headers.build(sources)
+    try:
+        for filename, code in sources:
+            if precompiled_headers.parse(filename, code) is None:
+                get_index().parse(path=filename, args=DEFAULT_CLANG_ARGS + clang_args, options=PARSE_OPTIONS)
+    finally:
+        precompiled_headers.release()
+
+
+CONFIGURATIONS = {
+    "index per file, default options": parse_with_index_per_file,
+    "shared index, tuned options": parse_with_shared_index,
+    "precompiled headers": parse_with_precompiled_headers,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="libclang parsing benchmark")
+    parser.add_argument("--paths", nargs="+", default=[], help="Directories with C files to parse instead of the synthetic corpus.")
+    parser.add_argument("--programs", type=int, default=50, help="Number of programs of the synthetic corpus.")
+    parser.add_argument("--functions", type=int, default=5, help="Number of functions in every program of the synthetic corpus.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--clang_args", type=str, default="", help="Extra arguments passed to libclang.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.paths:
+            filenames = sorted(filename for path in args.paths for filename in glob.glob(os.path.join(path, "**", "*.c"), recursive=True))
+        else:
+            filenames = generate_corpus(directory, args.programs, args.functions)
+        print(f"{len(filenames)} files:")
+        for name, parse in CONFIGURATIONS.items():
+            times = []
+            for _ in range(args.repeats):
+                start_time = time.perf_counter()
+                parse(filenames, shlex.split(args.clang_args))
+                times.append(time.perf_counter() - start_time)
+            print(f"    {name:<36} best {min(times) * 1000 / max(1, len(filenames)):8.3f} ms per file")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Measures time of stages of tokenization of C programs: parsing with libclang, filtering of top level cursors and their conversion
+to Forseti tokens.
+
+Programs are parsed in a single process. By default a synthetic corpus is generated (see parse_benchmark), real programs can be used
+instead with --paths, given the same way as to the application (e.g. a directory, in which every directory with sources is a program).
+
+Usage: python -m benchmarks.tokenization_benchmark --programs 100 --functions 20
+"""
+
+import argparse
+import shlex
+import tempfile
+import time
+
+from app.files_scanner import scan_for_files
+from app.programs_reader import read_programs_sets
+from benchmarks.parse_benchmark import generate_corpus
+from pl.forseti.c_code.ccode_filter import CCodeFilter
+from pl.forseti.c_code.ccode_parser import CCodeParser
+from pl.forseti.program import Program
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokenization stages benchmark")
+    parser.add_argument("--paths", nargs="+", action="append", default=[], help="Paths to programs to tokenize instead of the synthetic corpus.")
+    parser.add_argument("--programs", type=int, default=100, help="Number of programs of the synthetic corpus.")
+    parser.add_argument("--functions", type=int, default=20, help="Number of functions in every program of the synthetic corpus.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--clang_args", type=str, default="", help="Extra arguments passed to libclang.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.paths:
+            programs = read_programs_sets(scan_for_files(args.paths, ["*.c", "*.h", "*.cpp"]))
+        else:
+            programs = [Program([filename], []) for filename in generate_corpus(directory, args.programs, args.functions)]
+        print(f"{len(programs)} programs:")
+        best_stage_times = {}
+        for _ in range(args.repeats):
+            code_parser = CCodeParser(CCodeFilter(), shlex.split(args.clang_args))
+            start_time = time.perf_counter()
+            for program in programs:
+                code_parser.parse(program)
+            stage_times = dict(code_parser.stage_times, total=time.perf_counter() - start_time)
+            for stage, stage_time in stage_times.items():
+                best_stage_times[stage] = min(best_stage_times.get(stage, stage_time), stage_time)
+        for stage, stage_time in best_stage_times.items():
+            print(f"    {stage:<10} best {stage_time * 1000 / max(1, len(programs)):8.3f} ms per program")
+
+
+if __name__ == "__main__":
+    main()
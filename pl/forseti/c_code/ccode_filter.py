@@ -29,81 +29,48 @@ class CCodeFilterConfig:
     is int var = (x + y)."""
 
 
-def is_initialization_list(cursor: ClangCursor) -> bool:
-    return cursor.kind is ClangCursorKind.INIT_LIST_EXPR
-
-
-def is_struct_declaration(cursor: ClangCursor) -> bool:
-    return cursor.kind is ClangCursorKind.STRUCT_DECL
-
-
-def is_function_declaration(cursor: ClangCursor) -> bool:
-    if cursor.kind is ClangCursorKind.FUNCTION_DECL:
-        return not cursor.is_definition()
-    return False
-
-
-def is_alias(cursor: ClangCursor) -> bool:
-    return cursor.kind is ClangCursorKind.TYPEDEF_DECL
-
-
-def is_mixed_declarations(cursor: ClangCursor) -> bool:
-    return cursor.kind is ClangCursorKind.DECL_STMT
-
-
-def is_brackets(cursor: ClangCursor) -> bool:
-    return cursor.kind is ClangCursorKind.COMPOUND_STMT
-
-
-def is_parent_expression(cursor: ClangCursor) -> bool:
-    return cursor.kind is ClangCursorKind.PAREN_EXPR
-
-
-def is_unexposed_expression(cursor: ClangCursor) -> bool:
-    return cursor.kind is ClangCursorKind.UNEXPOSED_EXPR
-
-
-def is_type_reference(cursor: ClangCursor) -> bool:
-    return cursor.kind is ClangCursorKind.TYPE_REF
+# Cursor kinds rejected by rules enabled by fields of CCodeFilterConfig. Rule of filter_function_declaration depends also on cursor
+# (only declarations without definition are rejected), so it is checked separately.
+CONFIGURABLE_REJECTED_KINDS = {
+    "filter_aliasses": ClangCursorKind.TYPEDEF_DECL,
+    "filter_mixed_declarations": ClangCursorKind.DECL_STMT,
+    "filter_struct_declaration": ClangCursorKind.STRUCT_DECL,
+    "filter_brackets": ClangCursorKind.COMPOUND_STMT,
+    "filter_parent_expression": ClangCursorKind.PAREN_EXPR,
+}
 
 
 class CCodeFilter:
     """"""
 
     def __init__(self, config=CCodeFilterConfig()) -> None:
-        # self.__config = config
-        self.__rules = []
-
-        fixed_filter_rules = [is_unexposed_expression, is_type_reference, is_initialization_list]
+        self.config = config
 
-        self.__rules += fixed_filter_rules
-
-        associated_rules = {}
-        associated_rules["filter_aliasses"] = is_alias
-        associated_rules["filter_mixed_declarations"] = is_mixed_declarations
-        associated_rules["filter_function_declaration"] = is_function_declaration
-        associated_rules["filter_struct_declaration"] = is_struct_declaration
-        associated_rules["filter_brackets"] = is_brackets
-        associated_rules["filter_parent_expression"] = is_parent_expression
+        # Values of rejected kinds, always rejected ones (unexposed expressions, type references, initialization lists and null statements) and
+        # configurable ones. Kinds are compared by values, because objects of kinds are not preserved when the filter is copied to worker processes.
+        self.__rejected_kinds = {
+            kind.value for kind in [ClangCursorKind.UNEXPOSED_EXPR, ClangCursorKind.TYPE_REF, ClangCursorKind.INIT_LIST_EXPR, ClangCursorKind.NULL_STMT]
+        }
 
         config_fields = asdict(config)
-        for field_name, rule in associated_rules.items():
+        for field_name, kind in CONFIGURABLE_REJECTED_KINDS.items():
             if config_fields[field_name]:
-                self.__rules.append(rule)
+                self.__rejected_kinds.add(kind.value)
+        self.__filter_function_declaration = config.filter_function_declaration
 
-    def validate(self, cursor: ClangCursorKind) -> bool:
+    def validate(self, cursor: ClangCursor) -> bool:
         """Decide, if particall clang cursor should be part of CodeUnit,
         based on config passed in CProgramFilter constructor."""
         # if not cursor or cursor.kind is TokenKind.Invalid:
         if not cursor:
             return False
 
-        # temporary solution
-        if cursor.kind is ClangCursorKind.NULL_STMT:
+        # Single lookup instead of checking every rule, validate is called for every cursor.
+        kind = cursor.kind.value
+        if kind in self.__rejected_kinds:
             return False
 
-        for rule in self.__rules:
-            if rule(cursor):
-                return False
+        if self.__filter_function_declaration and kind == ClangCursorKind.FUNCTION_DECL.value and not cursor.is_definition():
+            return False
 
         return True
@@ -1,20 +1,91 @@
 import logging
-import os
 import codecs
+import functools
+import time
 
-from typing import List
-from clang.cindex import Index
+from dataclasses import asdict
+
+from typing import Dict, List, Tuple
+from clang.cindex import Index, TranslationUnit, conf, _CXString
 from ..code_parser import CodeParser
 from ..program import Program
 from ..tokenized_program import TokenizedProgram
 from .clang_ast_converter import ClangASTConverter
 from .ccode_filter import CCodeFilter
+from .precompiled_headers import PrecompiledHeaders
+
+# Here I also added NULL definition - because I skip all standard includes, it's recognized by libcland.
+# Warnings are never read, so they are not produced at all.
+DEFAULT_CLANG_ARGS = ["-D NULL=0", "-w"]
+# CXTranslationUnit_IgnoreNonErrorsFromIncludedFiles - diagnostics of included (e.g. system) headers are not needed. Python bindings
+# do not define it. It is supported since libclang 9, older versions ignore unknown flags and report all diagnostics.
+PARSE_IGNORE_NON_ERRORS_FROM_INCLUDED_FILES = 0x4000
+# Detailed preprocessing record is not requested, Forseti uses only cursors of declarations and statements.
+PARSE_OPTIONS = TranslationUnit.PARSE_NONE | PARSE_IGNORE_NON_ERRORS_FROM_INCLUDED_FILES
+
+# Indexes of the process by their excludeDecls option. Creating index is not free and all translation units can share it,
+# so it is created once per (worker) process.
+_indexes: Dict[bool, Index] = {}
+
+
+def get_index(exclude_declarations: bool = False) -> Index:
+    """Returns index of the process. Index used with precompiled headers excludes their declarations, when children of translation unit
+    are visited - otherwise all of them are loaded from precompiled header, only to be filtered out as declarations of other files."""
+    if exclude_declarations not in _indexes:
+        _indexes[exclude_declarations] = Index.create(excludeDecls=exclude_declarations)
+    return _indexes[exclude_declarations]
+
+
+def libclang_version() -> str:
+    try:
+        get_version = conf.lib.clang_getClangVersion
+        get_version.restype = _CXString
+        return _CXString.from_result(get_version())
+    except Exception:
+        return conf.get_filename() or ""
 
 
 class CCodeParser(CodeParser):
-    def __init__(self, ccodeFilter: CCodeFilter) -> None:
+    def __init__(self, ccodeFilter: CCodeFilter, clang_args: List[str] = [], use_precompiled_headers: bool = False) -> None:
+        """Extra clang_args (e.g. include directories or macro definitions) are passed to libclang after the default ones.
+        If use_precompiled_headers is set, common system includes of parsed programs are precompiled in prepare (see PrecompiledHeaders)."""
         super().__init__()
         self.clang_ast_converter = ClangASTConverter(ccodeFilter)
+        self.__clang_args = DEFAULT_CLANG_ARGS + list(clang_args)
+        self.__precompiled_headers = (
+            PrecompiledHeaders(self.__clang_args, PARSE_OPTIONS, functools.partial(get_index, True)) if use_precompiled_headers else None
+        )
+        # Total time (in seconds) of parsing with libclang, filtering of top level cursors and their conversion in this process.
+        self.stage_times: Dict[str, float] = {"parse": 0.0, "filter": 0.0, "convert": 0.0}
+
+    def configuration_fingerprint(self) -> str:
+        """Tokens depend on configuration of the filter, arguments and version of libclang."""
+        return f"{super().configuration_fingerprint()}:{asdict(self.clang_ast_converter.cursor_filter.config)}:{self.__clang_args}:{libclang_version()}"
+
+    def prepare(self, programs: List[Program]) -> None:
+        if self.__precompiled_headers is not None:
+            self.__precompiled_headers.build((source for program in programs for source in self.__sources__(program)))
+
+    def release(self) -> None:
+        if self.__precompiled_headers is not None:
+            self.__precompiled_headers.release()
+
+    def __sources__(self, program: Program) -> List[Tuple[str, str]]:
+        """Returns (filename, code) of all files of program."""
+        if len(program.raw_codes):
+            return list(zip(program.filenames, ["".join(self.remove_BOM_from_code(file_content)) for file_content in program.raw_codes]))
+        sources = []
+        for filename in program.filenames:
+            with open(filename, "r", errors="replace") as file:
+                sources.append((filename, file.read()))
+        return sources
+
+    def __parse_file__(self, filename: str, code: str, **parse_arguments):
+        if self.__precompiled_headers is not None:
+            translation_unit = self.__precompiled_headers.parse(filename, code, **parse_arguments)
+            if translation_unit is not None:
+                return translation_unit
+        return get_index().parse(path=filename, args=self.__clang_args, options=PARSE_OPTIONS, **parse_arguments)
 
     def remove_BOM_from_code(self, file_content):
         BOMLEN = len(codecs.BOM_UTF8)
@@ -24,71 +95,68 @@ class CCodeParser(CodeParser):
 
     def __parse_program_in_memory__(self, program: Program):
         translation_units = []
-        filenames_with_src_codes = list(zip(program.filenames, ["".join(self.remove_BOM_from_code(file_content)) for file_content in program.raw_codes]))
-        for filename in program.filenames:
+        filenames_with_src_codes = self.__sources__(program)
+        for filename, code in filenames_with_src_codes:
             # Parse file.
             logging.debug("Processing %s ...", filename)
-
-            # create index
-            index = Index.create()
-
-            # parse file
-            # Here I also added NULL definition - because I skip all standard includes, it's recognized by libcland
-            translation_units.append(index.parse(path=filename, unsaved_files=filenames_with_src_codes, args=["-D NULL=0"]))
+            translation_units.append(self.__parse_file__(filename, code, unsaved_files=filenames_with_src_codes))
         return translation_units
 
     def __parse_program_from_file__(self, program: Program):
         translation_units = []
-        for filename in program.filenames:
+        for filename, code in self.__sources__(program):
             # Parse file.
             logging.debug("Processing %s ...", filename)
-
-            # create index
-            index = Index.create()
-
-            # parse file
-            # Here I also added NULL definition - because I skip all standard includes, it's recognized by libcland
-            translation_units.append(index.parse(path=filename, args=["-D NULL=0"]))
+            translation_units.append(self.__parse_file__(filename, code))
         return translation_units
 
     def __filter_translation_units__(self, translation_units: List, program_filenames: List[str]):
+        """Returns top level cursors of files of program. Headers included by many files of program are in many translation units,
+        so every (file, extent) is returned only once and it is converted only once.
+
+        Converter keeps the first of top level tokens with the same name, kind and type in reversed order of cursors, so the last
+        occurrence of a cursor is the one, which is kept - translation units are visited from the last one."""
+        program_filenames = set(program_filenames)
+        converted_extents = set()
         cursors = []
-        for translation_unit in translation_units:
-            for node in translation_unit.cursor.get_children():
-                if node.location.file.name in program_filenames:
+        for translation_unit in reversed(translation_units):
+            for node in reversed(list(translation_unit.cursor.get_children())):
+                filename = node.location.file.name
+                if filename not in program_filenames:
+                    continue
+                extent = node.extent
+                key = (filename, extent.start.offset, extent.end.offset)
+                if key not in converted_extents:
+                    converted_extents.add(key)
                     cursors.append(node)
+        cursors.reverse()
         return cursors
 
     def parse(self, program: Program) -> TokenizedProgram:
         logging.debug("C program processing ...")
 
-        tokenized_program = TokenizedProgram()
-        tokenized_program.filenames = program.filenames
-        tokenized_program.raw_codes = program.raw_codes
-        if not program.author:
-            basename = os.path.basename(os.path.dirname(program.filenames[0]))
-            if len(program.filenames) > 1:
-                tokenized_program.author = str(basename)
-            else:
-                filename = os.path.splitext(os.path.basename(program.filenames[0]))[0]
-                tokenized_program.author = str(basename) + str(filename)
-
-        else:
-            tokenized_program.author = program.author
+        tokenized_program = self.new_tokenized_program(program)
 
         logging.debug("Parsing ...")
+        start_time = time.perf_counter()
         translation_units = []
         if len(program.raw_codes):
             translation_units = self.__parse_program_in_memory__(program)
         else:
             translation_units = self.__parse_program_from_file__(program)
+        parse_end_time = time.perf_counter()
 
         logging.debug("Filtering tokens ...")
         cursors = self.__filter_translation_units__(translation_units, program.filenames)
+        filter_end_time = time.perf_counter()
 
         logging.debug("Converting Clang tokens to Forseti format ...")
 
         tokenized_program.code_units = self.clang_ast_converter.convert(cursors)
+        convert_end_time = time.perf_counter()
+        self.stage_times["parse"] += parse_end_time - start_time
+        self.stage_times["filter"] += filter_end_time - parse_end_time
+        self.stage_times["convert"] += convert_end_time - filter_end_time
 
         logging.debug("Program parsing done.")
         return tokenized_program
@@ -15,6 +15,20 @@ def __add_children_to_stack__(parent_token: Token, cursor: ClangCursorKind, stac
     stack.extendleft(reversed(new_elements))
 
 
+# Flattened conversion tables (see ClangASTConverter.conversion_tables), built once per process.
+_conversion_tables: Tuple[Dict[ClangCursorKind, TokenKind], Dict[ClangCursorType, TokenKind]] = None
+
+
+def __flatten_conversion_map__(conversion_map: Dict) -> Dict:
+    """Returns conversion map, in which every kind is a separate key (instead of tuples of kinds with the same value)."""
+    flattened_map = {}
+    for clang_kinds, token_kind in conversion_map.items():
+        for clang_kind in clang_kinds if isinstance(clang_kinds, tuple) else (clang_kinds,):
+            # In the original map the first matching entry wins.
+            flattened_map.setdefault(clang_kind, token_kind)
+    return flattened_map
+
+
 class ClangASTConverter:
     def create_cursor_kind_conversion_dict(self) -> Dict[ClangCursorKind, TokenKind]:
         conversion_map: Dict[ClangCursorKind, TokenKind] = {}
@@ -97,6 +111,17 @@ class ClangASTConverter:
     def __init__(self, cursor_filter: CCodeFilter) -> None:
         self.cursor_filter = cursor_filter
 
+    def conversion_tables(self) -> Tuple[Dict[ClangCursorKind, TokenKind], Dict[ClangCursorType, TokenKind]]:
+        """Returns cursor kind and type kind conversion maps with a single kind in every key, so kinds are converted with one lookup.
+        Clang kinds are singletons, so they can be used as keys directly."""
+        global _conversion_tables
+        if _conversion_tables is None:
+            _conversion_tables = (
+                __flatten_conversion_map__(self.create_cursor_kind_conversion_dict()),
+                __flatten_conversion_map__(self.create_type_kind_conversion_map__()),
+            )
+        return _conversion_tables
+
     def __get_numeric_literal__(self, clang_cursor: ClangCursor) -> str:
         tokens = [token for token in clang_cursor.get_tokens()]
         # It seems like clang interpret 'NULL' in some strange way, so this if statment is needed.
@@ -123,45 +148,28 @@ class ClangASTConverter:
                 return token.spelling, Location(token.location.file.name, token.location.line, token.location.column)
         return ""
 
-    def __clang_cursor_kind_to_token_type_kind__(self, clang_cursor: ClangCursor, conversion_types_map) -> VariableTokenKind:
-        clang_canonical_type = clang_cursor.type.get_canonical().kind
-
-        for clang_type_kind, token_type_kind in conversion_types_map.items():
-            if isinstance(clang_type_kind, tuple):
-                if clang_canonical_type in clang_type_kind:
-                    return token_type_kind
-            else:
-                if clang_canonical_type == clang_type_kind:
-                    return token_type_kind
-
-        return VariableTokenKind.NoType
+    def __clang_cursor_kind_to_token_type_kind__(self, clang_canonical_type: ClangCursorType, conversion_types_map) -> VariableTokenKind:
+        return conversion_types_map.get(clang_canonical_type, VariableTokenKind.NoType)
 
     def __clang_cursor_kind_to_token_kind__(self, clang_cursor: ClangCursor, conversion_cursor_map) -> TokenKind:
-        clang_cursor_kind = clang_cursor.kind
-        for clang_kind, token_kind in conversion_cursor_map.items():
-            if isinstance(clang_kind, tuple):
-                if clang_cursor_kind in clang_kind:
-                    return token_kind
-            else:
-                if clang_cursor_kind == clang_kind:
-                    return token_kind
-
-        return TokenKind.Invalid
+        return conversion_cursor_map.get(clang_cursor.kind, TokenKind.Invalid)
 
     def __clang_cursor_to_token__(self, clang_cursor: ClangCursor, parent_token: Token, conversion_cursor_map, conversion_types_map) -> Token:
         token = Token()
         token.name = clang_cursor.displayname
-        token.type_name = clang_cursor.type.get_canonical().spelling
+        canonical_type = clang_cursor.type.get_canonical()
+        token.type_name = canonical_type.spelling
         token.token_kind = self.__clang_cursor_kind_to_token_kind__(clang_cursor, conversion_cursor_map)
-        token.variable_token_kind = self.__clang_cursor_kind_to_token_type_kind__(clang_cursor, conversion_types_map)
+        token.variable_token_kind = self.__clang_cursor_kind_to_token_type_kind__(canonical_type.kind, conversion_types_map)
         token.parent_token = parent_token
         # TODO: Maybe its worth to store only basename?
-        token.location = Location(clang_cursor.location.file.name, clang_cursor.location.line, clang_cursor.location.column)
+        location = clang_cursor.location
+        token.location = Location(location.file.name, location.line, location.column)
 
         # From function result type I need to get location explicitly
         if token.token_kind == TokenKind.FunctionDecl:
             result_token_location = next(clang_cursor.get_tokens()).location
-            token.location = Location(clang_cursor.location.file.name, result_token_location.line, result_token_location.column)
+            token.location = Location(location.file.name, result_token_location.line, result_token_location.column)
 
         if token.token_kind == TokenKind.BinaryOp:
             token.name, token.location = self.__get_binary_op_token__(clang_cursor)
@@ -217,8 +225,7 @@ class ClangASTConverter:
         return filtered
 
     def convert(self, clang_cursors: List[ClangCursor]) -> List["CodeUnit"]:
-        conversion_cursor_map = self.create_cursor_kind_conversion_dict()
-        conversion_types_map = self.create_type_kind_conversion_map__()
+        conversion_cursor_map, conversion_types_map = self.conversion_tables()
         root_ast_tokens, stack = self.__convert_root_cursors__(clang_cursors, conversion_cursor_map, conversion_types_map)
         self.__convert_children_cursors__(stack, conversion_cursor_map, conversion_types_map)
         return [CodeUnit(root_token) for root_token in self.__remove_repetive_top_tokens__(root_ast_tokens)]
@@ -0,0 +1,117 @@
+import logging
+import os
+import re
+import shutil
+import tempfile
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from clang.cindex import Diagnostic, Index, TranslationUnitLoadError, TranslationUnitSaveError
+
+# Directive including a system header (e.g. #include <stdio.h>). Headers of submissions are included with quotes and may differ between
+# submissions, so they are never precompiled.
+SYSTEM_INCLUDE = re.compile(r"^#\s*include\s*(<[^<>]+>)\s*(//.*)?$")
+CPP_EXTENSIONS = {".cpp", ".cc", ".cxx", ".hpp", ".hh", ".hxx"}
+
+# Precompiled header is built only for include preambles shared by at least that many files.
+MINIMAL_NUMBER_OF_FILES = 2
+# Maximal number of built precompiled headers (for the most common preambles).
+MAXIMAL_NUMBER_OF_HEADERS = 16
+
+
+def include_preamble(code: str) -> str:
+    """Returns system includes at the beginning of code (only blank lines and comments can be between them), one per line."""
+    includes = []
+    in_comment = False
+    for line in code.splitlines():
+        stripped = line.strip()
+        if in_comment or stripped.startswith("/*"):
+            # Only comments, which are whole lines, can be skipped - code after the end of comment ends the preamble.
+            end = stripped.find("*/", 0 if in_comment else 2)
+            in_comment = end == -1
+            if not in_comment and stripped[end + 2 :].strip():
+                break
+        elif not stripped or stripped.startswith("//"):
+            continue
+        elif SYSTEM_INCLUDE.match(stripped):
+            includes.append(f"#include {SYSTEM_INCLUDE.match(stripped).group(1)}")
+        else:
+            break
+    return "".join(include + "\n" for include in includes)
+
+
+def header_language(filename: str) -> str:
+    return "c++-header" if os.path.splitext(filename)[1].lower() in CPP_EXTENSIONS else "c-header"
+
+
+class PrecompiledHeaders:
+    """Precompiled headers of include preambles common to many files of the parsed programs.
+
+    Most of parse time of a typical submission is spent on standard headers, which are the same in every submission. Include preamble
+    (system includes at the beginning) of every file is detected and for the most common preambles a precompiled header is built once.
+    File is parsed with precompiled header only if its preamble is exactly the same, so the state of preprocessor after preamble does
+    not change and the rest of the file is parsed as before (included headers are protected by include guards). If libclang fails to
+    use the precompiled header, the file is parsed without it."""
+
+    def __init__(self, clang_args: List[str], parse_options: int, get_index: Callable[[], Index]) -> None:
+        """get_index returns index of the process, which excludes declarations from precompiled headers (see ccode_parser.get_index)."""
+        self.__clang_args = clang_args
+        self.__get_index = get_index
+        self.__parse_options = parse_options
+        self.__directory = None
+        self.headers: Dict[Tuple[str, str], str] = {}
+
+    def build(self, sources: Iterable[Tuple[str, str]]) -> None:
+        """Builds precompiled headers for the most common include preambles of (filename, code) sources."""
+        preambles = Counter((header_language(filename), include_preamble(code)) for filename, code in sources)
+        self.__directory = tempfile.mkdtemp(prefix="forseti_pch_")
+        for (language, preamble), count in preambles.most_common(MAXIMAL_NUMBER_OF_HEADERS):
+            if count < MINIMAL_NUMBER_OF_FILES:
+                break
+            if not preamble:
+                continue
+            path = self.__build_header__(language, preamble, os.path.join(self.__directory, f"preamble_{len(self.headers)}.h"))
+            if path is not None:
+                self.headers[(language, preamble)] = path
+        logging.info(f"{len(self.headers)} precompiled headers built for {sum(preambles.values())} files.")
+
+    def __build_header__(self, language: str, preamble: str, path: str) -> str:
+        try:
+            # Files include headers of preamble again after precompiled header, so it is checked that it does not cause errors
+            # (e.g. a header without include guard). Incomplete header (e.g. with missing include) would change parsing of files too.
+            with open(path, "w") as file:
+                file.write(preamble + preamble)
+            translation_unit = self.__get_index().parse(path=path, args=self.__clang_args + ["-x", language], options=self.__parse_options)
+            if any(diagnostic.severity >= Diagnostic.Error for diagnostic in translation_unit.diagnostics):
+                logging.debug("Precompiled header is not built, because preamble contains errors:\n%s", preamble)
+                return None
+            with open(path, "w") as file:
+                file.write(preamble)
+            translation_unit = self.__get_index().parse(path=path, args=self.__clang_args + ["-x", language], options=self.__parse_options)
+            translation_unit.save(path + ".pch")
+        except (TranslationUnitLoadError, TranslationUnitSaveError):
+            logging.debug("Precompiled header is not built for preamble:\n%s", preamble, exc_info=True)
+            return None
+        return path + ".pch"
+
+    def parse(self, filename: str, code: str, **parse_arguments):
+        """Parses file with precompiled header of its preamble. Returns None, if there is no such header or it could not be used."""
+        header = self.headers.get((header_language(filename), include_preamble(code)))
+        if header is None:
+            return None
+        try:
+            arguments = self.__clang_args + ["-include-pch", header]
+            translation_unit = self.__get_index().parse(path=filename, args=arguments, options=self.__parse_options, **parse_arguments)
+        except TranslationUnitLoadError:
+            return None
+        if any(diagnostic.severity >= Diagnostic.Fatal for diagnostic in translation_unit.diagnostics):
+            # Fatal error can be caused by precompiled header (e.g. modified system header), so file is parsed again without it.
+            return None
+        return translation_unit
+
+    def release(self) -> None:
+        """Removes built headers. It must be called by the process, which built them, when they are not needed anymore."""
+        if self.__directory is not None:
+            shutil.rmtree(self.__directory, ignore_errors=True)
+        self.__directory = None
+        self.headers = {}
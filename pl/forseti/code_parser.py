@@ -1,4 +1,7 @@
+import hashlib
+import os
 from abc import ABC, abstractmethod
+from typing import List
 from .program import Program
 from .tokenized_program import TokenizedProgram
 
@@ -7,3 +10,46 @@ class CodeParser(ABC):
     @abstractmethod
     def parse(self, program: Program) -> TokenizedProgram:
         pass
+
+    def prepare(self, programs: List[Program]) -> None:
+        """Called before programs are parsed (possibly by copies of the parser in other processes), e.g. to build resources shared by them."""
+        pass
+
+    def release(self) -> None:
+        """Releases resources created by prepare, when programs are parsed."""
+        pass
+
+    def configuration_fingerprint(self) -> str:
+        """Returns string, which changes whenever configuration of the parser could change tokens of parsed programs.
+        It is a part of keys of tokenization cache."""
+        return type(self).__name__
+
+    def content_hash(self, program: Program) -> str:
+        """Returns hash of names and contents of all files of program."""
+        content_hash = hashlib.sha256()
+        for i, filename in enumerate(program.filenames):
+            if len(program.raw_codes):
+                content = "".join(program.raw_codes[i]).encode("utf-8", "surrogatepass")
+            else:
+                with open(filename, "rb") as file:
+                    content = file.read()
+            content_hash.update(os.path.basename(filename).encode("utf-8", "surrogatepass") + b"\0")
+            content_hash.update(hashlib.sha256(content).digest())
+        return content_hash.hexdigest()
+
+    def new_tokenized_program(self, program: Program) -> TokenizedProgram:
+        """Returns tokenized program without code units, with files and author of program."""
+        tokenized_program = TokenizedProgram()
+        tokenized_program.filenames = program.filenames
+        tokenized_program.raw_codes = program.raw_codes
+        if not program.author:
+            basename = os.path.basename(os.path.dirname(program.filenames[0]))
+            if len(program.filenames) > 1:
+                tokenized_program.author = str(basename)
+            else:
+                filename = os.path.splitext(os.path.basename(program.filenames[0]))[0]
+                tokenized_program.author = str(basename) + str(filename)
+
+        else:
+            tokenized_program.author = program.author
+        return tokenized_program
@@ -1,32 +1,101 @@
 import copy
 import logging
 import tqdm
-from typing import List
+from typing import Dict, List
 from .program import Program
 from .tokenized_program import TokenizedProgram
 from .code_parser import CodeParser
-from .utils.multiprocessing import execute_function_in_multiprocesses
+from .tokenization_cache import TokenizationCache
+from .code_units_serialization import deserialize_tokenized_programs, serialize_tokenized_programs
+from .utils.multiprocessing import iterate_function_in_multiprocesses
 
 
 class CodeTokenizer:
-    def __init__(self, code_parser: CodeParser, n_processors: int = -1) -> None:
+    def __init__(self, code_parser: CodeParser, n_processors: int = -1, tokenization_cache: TokenizationCache = None) -> None:
         self.code_parser = code_parser
         self.__n_processors = n_processors
+        self.__tokenization_cache = tokenization_cache
 
     @staticmethod
-    def multiprocessing_parsing(code_parser_and_program):
+    def multiprocessing_parsing(code_parser_and_program) -> bytes:
+        # Serialized (columnar) programs are much smaller and faster to transfer than pickled trees of tokens.
         code_parser, program = code_parser_and_program
-        return code_parser.parse(program)
+        return serialize_tokenized_programs([code_parser.parse(program)])
 
-    def parse_programs(self, programs_sets: List[Program]) -> List[TokenizedProgram]:
-        logging.info("Parsing programs...")
-        if self.__n_processors == 1:
-            programs = [self.code_parser.parse(program) for program in tqdm.tqdm(programs_sets)]
-        else:
+    def __parse_unique__(self, programs_sets: List[Program]) -> List[TokenizedProgram]:
+        self.code_parser.prepare(programs_sets)
+        try:
+            if self.__n_processors == 1:
+                return [self.code_parser.parse(program) for program in tqdm.tqdm(programs_sets)]
             parsers = [copy.deepcopy(self.code_parser) for _ in range(len(programs_sets))]
-            programs = execute_function_in_multiprocesses(
+            # Programs are returned in order of programs_sets, so they can be matched with their keys in tokenization cache.
+            serialized_programs = iterate_function_in_multiprocesses(
                 CodeTokenizer.multiprocessing_parsing, list(zip(parsers, programs_sets)), max([int(self.__n_processors / 2), 1])
             )
+            return [deserialize_tokenized_programs(serialized_program)[0] for serialized_program in serialized_programs]
+        finally:
+            self.code_parser.release()
+
+    def __parse__(self, programs_sets: List[Program], content_hashes: List[str]) -> List[TokenizedProgram]:
+        """Identical programs (with the same content hash) are parsed only once, the other ones get copies of its code units.
+        Locations of tokens of copies are moved to files of their programs."""
+        first_of_hash: Dict[str, int] = {}
+        for i, content_hash in enumerate(content_hashes):
+            first_of_hash.setdefault(content_hash, i)
+        if len(first_of_hash) < len(programs_sets):
+            logging.info(f"{len(programs_sets) - len(first_of_hash)} of {len(programs_sets)} programs are identical to other ones, they are not parsed.")
+        parsed_programs = dict(zip(first_of_hash, self.__parse_unique__([programs_sets[i] for i in first_of_hash.values()])))
+
+        programs: List[TokenizedProgram] = []
+        serialized_programs: Dict[str, bytes] = {}
+        for i, (program, content_hash) in enumerate(zip(programs_sets, content_hashes)):
+            if first_of_hash[content_hash] == i:
+                programs.append(parsed_programs[content_hash])
+                continue
+            # Code units are flattened in place by detection, so every program gets its own copy.
+            if content_hash not in serialized_programs:
+                serialized_programs[content_hash] = serialize_tokenized_programs([parsed_programs[content_hash]])
+            tokenized_program = self.code_parser.new_tokenized_program(program)
+            tokenized_program.code_units = deserialize_tokenized_programs(serialized_programs[content_hash], [program.filenames])[0].code_units
+            programs.append(tokenized_program)
+        return programs
+
+    def __parse_with_cache__(self, programs_sets: List[Program]) -> List[TokenizedProgram]:
+        """Takes code units of unchanged programs from the tokenization cache, only the rest of programs is parsed."""
+        fingerprint = self.code_parser.configuration_fingerprint()
+        content_hashes = [self.code_parser.content_hash(program) for program in programs_sets]
+        keys = [TokenizationCache.key(content_hash, fingerprint) for content_hash in content_hashes]
+        cached_code_units = self.__tokenization_cache.get_many([(key, program.filenames) for key, program in zip(keys, programs_sets)])
+
+        programs: List[TokenizedProgram] = [None] * len(programs_sets)
+        indexes_to_parse = []
+        for i, code_units in enumerate(cached_code_units):
+            if code_units is None:
+                indexes_to_parse.append(i)
+            else:
+                programs[i] = self.code_parser.new_tokenized_program(programs_sets[i])
+                programs[i].code_units = code_units
+        logging.info(
+            f"Tokenization cache: {len(programs_sets) - len(indexes_to_parse)} hits, {len(indexes_to_parse)} misses "
+            f"(total {self.__tokenization_cache.hits} hits, {self.__tokenization_cache.misses} misses)."
+        )
+
+        parsed_programs = (
+            self.__parse__([programs_sets[i] for i in indexes_to_parse], [content_hashes[i] for i in indexes_to_parse]) if indexes_to_parse else []
+        )
+        for i, parsed_program in zip(indexes_to_parse, parsed_programs):
+            programs[i] = parsed_program
+        # Entries are serialized before code units are flattened in place by detection. Identical programs are stored once.
+        entries = {keys[i]: (keys[i], programs[i].code_units, programs_sets[i].filenames) for i in indexes_to_parse}
+        self.__tokenization_cache.put_many(list(entries.values()))
+        return programs
+
+    def parse_programs(self, programs_sets: List[Program]) -> List[TokenizedProgram]:
+        logging.info("Parsing programs...")
+        if self.__tokenization_cache is not None:
+            programs = self.__parse_with_cache__(programs_sets)
+        else:
+            programs = self.__parse__(programs_sets, [self.code_parser.content_hash(program) for program in programs_sets])
 
         filtered_programs = []
         for p in programs:
@@ -1,8 +1,13 @@
 from typing import List
 from dataclasses import dataclass, field
+import numpy as np
 
 
 @dataclass
 class CodeUnit:
     ast: List["Token"] = field(default_factory=list)
+    # Sorted winnowing fingerprints of flattened ast, computed only if winnowing is enabled.
+    fingerprints: np.ndarray = None
+    # Number of tokens of every token kind (indexed by TokenKind.id) in flattened ast.
+    kinds_histogram: np.ndarray = None
     # tokenized_program: 'TokenizedProgram' = None
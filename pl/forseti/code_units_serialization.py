@@ -0,0 +1,205 @@
+import json
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .code_unit import CodeUnit
+from .token import Location, Token, TokenKind
+from .tokenized_program import TokenizedProgram
+
+MAGIC = b"FORSETI\0"
+FORMAT_VERSION = 1
+# Index of path, which marks token without location.
+NO_LOCATION = -1
+# Arrays are aligned, so they can be used directly as views of memory mapped file.
+ALIGNMENT = 8
+
+# Columns describing tokens, every of them has one element per token.
+TOKEN_COLUMNS = [
+    ("kinds", np.int16),
+    ("variable_kinds", np.int16),
+    ("names", np.int32),
+    ("type_names", np.int32),
+    ("parents", np.int32),
+    ("paths", np.int32),
+    ("lines", np.int32),
+    ("columns", np.int32),
+]
+
+
+class StringTable:
+    """Interns strings into consecutive integer ids."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+
+    def id(self, string: str) -> int:
+        return self.ids.setdefault(string, len(self.ids))
+
+    def to_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns UTF-8 encoded, concatenated strings and offsets of their ends."""
+        encoded = [string.encode("utf-8", "surrogatepass") for string in self.ids]
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), np.cumsum([len(string) for string in encoded], dtype=np.int64)
+
+    @staticmethod
+    def from_arrays(data: np.ndarray, ends: np.ndarray) -> List[str]:
+        data = data.tobytes()
+        begins = [0] + ends[:-1].tolist()
+        return [data[begin:end].decode("utf-8", "surrogatepass") for begin, end in zip(begins, ends.tolist())]
+
+
+def __tokens_to_columns__(tokenized_programs: List[TokenizedProgram]) -> Dict[str, np.ndarray]:
+    """Returns columns of tokens of all programs in preorder. Roots of code units have parent -1.
+    Paths are interned separately from names and files of every program are interned first."""
+    strings, path_strings = StringTable(), StringTable()
+    columns: Dict[str, list] = {name: [] for name, _ in TOKEN_COLUMNS}
+    kinds, variable_kinds, names, type_names = columns["kinds"], columns["variable_kinds"], columns["names"], columns["type_names"]
+    parents, paths, lines, location_columns = columns["parents"], columns["paths"], columns["lines"], columns["columns"]
+    program_ends = []
+    for tokenized_program in tokenized_programs:
+        for filename in tokenized_program.filenames:
+            path_strings.id(filename)
+        for code_unit in tokenized_program.code_units:
+            # Explicit stack is used, recursive generators are slow for deep trees.
+            stack = [(code_unit.ast, -1)]
+            while stack:
+                token, parent = stack.pop()
+                index = len(kinds)
+                kinds.append(token.token_kind.id)
+                variable_kinds.append(token.variable_token_kind.id if token.variable_token_kind is not None else -1)
+                names.append(strings.id(token.name))
+                type_names.append(strings.id(token.type_name))
+                parents.append(parent)
+                location = token.location
+                if location is not None:
+                    paths.append(path_strings.id(location.path))
+                    lines.append(location.line)
+                    location_columns.append(location.column)
+                else:
+                    paths.append(NO_LOCATION)
+                    lines.append(-1)
+                    location_columns.append(-1)
+                stack.extend((child, index) for child in reversed(token.children))
+        program_ends.append(len(kinds))
+
+    arrays = {name: np.array(columns[name], dtype=dtype) for name, dtype in TOKEN_COLUMNS}
+    arrays["program_ends"] = np.array(program_ends, dtype=np.int64)
+    arrays["string_data"], arrays["string_ends"] = strings.to_arrays()
+    arrays["path_data"], arrays["path_ends"] = path_strings.to_arrays()
+    return arrays
+
+
+def __code_units_from_columns__(columns: List[list], begin: int, end: int, strings: List[str], path_strings: List[str]) -> List[CodeUnit]:
+    """Rebuilds trees of tokens with indexes [begin, end) from columns (converted to lists)."""
+    kinds, variable_kinds, names, type_names, parents, paths, lines, location_columns = columns
+    token_kinds = TokenKind.token_kind_list
+    code_units: List[CodeUnit] = []
+    tokens: List[Token] = []
+    for i in range(begin, end):
+        path, parent, variable_kind = paths[i], parents[i], variable_kinds[i]
+        location = Location(path_strings[path], lines[i], location_columns[i]) if path != NO_LOCATION else None
+        parent_token = tokens[parent - begin] if parent != -1 else None
+        token = Token(
+            strings[names[i]],
+            strings[type_names[i]],
+            token_kinds[kinds[i]],
+            token_kinds[variable_kind] if variable_kind != -1 else None,
+            location,
+            [],
+            parent_token,
+        )
+        tokens.append(token)
+        if parent_token is None:
+            code_units.append(CodeUnit(token))
+        else:
+            parent_token.children.append(token)
+    return code_units
+
+
+def serialize_tokenized_programs(tokenized_programs: List[TokenizedProgram]) -> bytes:
+    """Serializes tokenized programs to a compact binary (columnar) form.
+
+    Trees of tokens are stored in preorder as columns: kind, variable kind, ids of name and type name in a string table, index of parent
+    and location (id of path in a path table, line and column). Authors, filenames and raw codes are stored in JSON header, which also
+    contains dtypes and offsets of columns. Columns are aligned, so serialized programs can be loaded from memory mapped file."""
+    arrays = __tokens_to_columns__(tokenized_programs)
+    header = {
+        "version": FORMAT_VERSION,
+        "programs": [{"author": p.author, "filenames": p.filenames, "raw_codes": p.raw_codes} for p in tokenized_programs],
+        "arrays": {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = [array.dtype.str, len(array), offset]
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    encoded_header = json.dumps(header).encode("utf-8")
+    encoded_header += b" " * (-(len(MAGIC) + 8 + len(encoded_header)) % ALIGNMENT)
+
+    parts = [MAGIC, struct.pack("<Q", len(encoded_header)), encoded_header]
+    for array in arrays.values():
+        parts.append(array.tobytes())
+        parts.append(b"\0" * (-array.nbytes % ALIGNMENT))
+    return b"".join(parts)
+
+
+def deserialize_tokenized_programs(buffer, filenames: List[List[str]] = None) -> List[TokenizedProgram]:
+    """Restores programs serialized by serialize_tokenized_programs from bytes or any other buffer (e.g. memory mapped file).
+    If filenames are given, they replace serialized filenames of programs (also in locations of tokens), so code units can be reused
+    by other programs with identical files."""
+    buffer = memoryview(buffer)
+    if bytes(buffer[: len(MAGIC)]) != MAGIC:
+        raise ValueError("Invalid format of serialized programs.")
+    (header_length,) = struct.unpack("<Q", buffer[len(MAGIC) : len(MAGIC) + 8])
+    data_begin = len(MAGIC) + 8 + header_length
+    header = json.loads(bytes(buffer[len(MAGIC) + 8 : data_begin]))
+    if header["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported version {header['version']} of serialized programs.")
+    arrays = {
+        name: np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=data_begin + offset) for name, (dtype, count, offset) in header["arrays"].items()
+    }
+
+    strings = StringTable.from_arrays(arrays["string_data"], arrays["string_ends"])
+    path_strings = StringTable.from_arrays(arrays["path_data"], arrays["path_ends"])
+    columns = [arrays[name].tolist() for name, _ in TOKEN_COLUMNS]
+    tokenized_programs: List[TokenizedProgram] = []
+    begin = 0
+    path_ids = {path: i for i, path in enumerate(path_strings)}
+    for k, (program, end) in enumerate(zip(header["programs"], arrays["program_ends"].tolist())):
+        program_filenames, program_path_strings = program["filenames"], path_strings
+        if filenames is not None:
+            program_filenames, program_path_strings = filenames[k], list(path_strings)
+            for old_filename, new_filename in zip(program["filenames"], program_filenames):
+                program_path_strings[path_ids[old_filename]] = new_filename
+        code_units = __code_units_from_columns__(columns, begin, end, strings, program_path_strings)
+        tokenized_programs.append(TokenizedProgram(code_units, program["raw_codes"], program_filenames, program["author"]))
+        begin = end
+    return tokenized_programs
+
+
+def save_tokenized_programs(path: str, tokenized_programs: List[TokenizedProgram]) -> None:
+    """Writes serialized programs to a file. File is replaced atomically, so it is never left partially written."""
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(serialize_tokenized_programs(tokenized_programs))
+    os.replace(temporary_path, path)
+
+
+def load_tokenized_programs(path: str) -> List[TokenizedProgram]:
+    """Reads programs saved by save_tokenized_programs. File is memory mapped, so only columns are read, not copied."""
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        return deserialize_tokenized_programs(mapped_file)
+
+
+def serialize_code_units(code_units: List[CodeUnit], filenames: List[str]) -> bytes:
+    """Serializes trees of tokens of code units of a program with given files to compressed binary form."""
+    return zlib.compress(serialize_tokenized_programs([TokenizedProgram(code_units, filenames=filenames)]))
+
+
+def deserialize_code_units(data: bytes, filenames: List[str]) -> List[CodeUnit]:
+    """Restores code units serialized by serialize_code_units. Paths of serialized program files are replaced by given filenames,
+    so code units can be reused by another program with identical files."""
+    return deserialize_tokenized_programs(zlib.decompress(data), [filenames])[0].code_units
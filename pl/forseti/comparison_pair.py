@@ -2,6 +2,7 @@ from dataclasses import dataclass, field
 from typing import List
 from .tokenized_program import TokenizedProgram
 from .token import Token
+from .code_unit import CodeUnit
 
 
 @dataclass
@@ -10,3 +11,5 @@ class ComparisonPair:
     program_b: TokenizedProgram
     tokens_a: List[Token]
     tokens_b: List[Token]
+    code_unit_a: CodeUnit = None
+    code_unit_b: CodeUnit = None
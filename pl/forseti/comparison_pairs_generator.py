@@ -1,37 +1,110 @@
-import itertools
-from typing import List, Tuple
+import bisect
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
 from .tokenized_program import TokenizedProgram
 from .comparison_pair import ComparisonPair
 from .token import Token
+from .code_unit import CodeUnit
+from .minhash_lsh import MinHashLSH
+
+ALL_PAIRS_GENERATION = "all_pairs"
+MINHASH_LSH_GENERATION = "minhash_lsh"
 
 
 class ComparisonPairsGenerator:
-    def __init__(self, compare_whole_programs: bool, max_number_of_differences_in_single_comparison_pair: int, assign_functions_based_on_types: bool) -> None:
+    def __init__(
+        self,
+        compare_whole_programs: bool,
+        max_number_of_differences_in_single_comparison_pair: int,
+        assign_functions_based_on_types: bool,
+        candidate_generation: str = ALL_PAIRS_GENERATION,
+        minhash_lsh: MinHashLSH = None,
+    ) -> None:
         self.__compare_whole_programs__ = compare_whole_programs
         self.__max_number_of_differences_in_single_comparison_pair__ = max_number_of_differences_in_single_comparison_pair
         self.__assign_functions_based_on_types__ = assign_functions_based_on_types
+        self.__candidate_generation__ = candidate_generation
+        self.__minhash_lsh__ = minhash_lsh if minhash_lsh else MinHashLSH()
+        # Merged code units of programs by their ids, so pairs of whole programs generated again share the same code units.
+        self.__merged_code_units__: Dict[int, CodeUnit] = {}
 
         if compare_whole_programs and assign_functions_based_on_types:
             raise Exception("Comparison pairs cannot be generated based on their types if you want compare entire programs!")
+        if candidate_generation not in [ALL_PAIRS_GENERATION, MINHASH_LSH_GENERATION]:
+            raise Exception(f"Unknown candidate generation method: {candidate_generation}")
+
+    def __join_key__(self, ast: List[Token]) -> Tuple:
+        """Code units can be compared only if their join keys are equal."""
+        if self.__assign_functions_based_on_types__:
+            return ast[0].token_kind.id, ast[0].name, ast[0].type_name
+        return (ast[0].token_kind.id,)
+
+    def __are_lengths_similar__(self, ast_a: List[Token], ast_b: List[Token]) -> bool:
+        max_differences = self.__max_number_of_differences_in_single_comparison_pair__
+        return max_differences == -1 or abs(len(ast_a) - len(ast_b)) <= max_differences
+
+    def __join__(self, asts: List[Tuple[TokenizedProgram, CodeUnit]]) -> Iterator[Tuple[int, int]]:
+        """Yields (i, j), i < j, of code units with equal join keys and similar lengths, in the same order as itertools.combinations.
+        Code units are grouped by join keys and every group is sorted by length, so only pairs inside the allowed length window are visited."""
+        keys = [self.__join_key__(code_unit.ast) for _, code_unit in asts]
+        buckets: Dict[Tuple, List[int]] = {}
+        for i, key in enumerate(keys):
+            buckets.setdefault(key, []).append(i)
+
+        max_differences = self.__max_number_of_differences_in_single_comparison_pair__
+        if max_differences == -1:
+            for i, key in enumerate(keys):
+                bucket = buckets[key]
+                yield from ((i, j) for j in bucket[bisect.bisect_right(bucket, i) :])
+            return
 
-    def generate(self, programs: List[TokenizedProgram], selected_programs_to_compare: List[str]) -> List[ComparisonPair]:
-        asts: List[Tuple[TokenizedProgram, Token]] = []
+        bucket_lengths: Dict[Tuple, List[int]] = {}
+        for key, bucket in buckets.items():
+            bucket.sort(key=lambda i: len(asts[i][1].ast))
+            bucket_lengths[key] = [len(asts[i][1].ast) for i in bucket]
+        for i, key in enumerate(keys):
+            bucket, lengths, length = buckets[key], bucket_lengths[key], len(asts[i][1].ast)
+            window = bucket[bisect.bisect_left(lengths, length - max_differences) : bisect.bisect_right(lengths, length + max_differences)]
+            yield from ((i, j) for j in sorted(j for j in window if j > i))
+
+    def __generate_candidates__(self, asts: List[Tuple[TokenizedProgram, CodeUnit]]) -> Iterator[Tuple[int, int]]:
+        if self.__candidate_generation__ == MINHASH_LSH_GENERATION:
+            for i, j in self.__minhash_lsh__.candidate_pairs([code_unit.ast for _, code_unit in asts]):
+                ast_a, ast_b = asts[i][1].ast, asts[j][1].ast
+                if self.__join_key__(ast_a) == self.__join_key__(ast_b) and self.__are_lengths_similar__(ast_a, ast_b):
+                    yield i, j
+        else:
+            yield from self.__join__(asts)
+
+    def generate(self, programs: List[TokenizedProgram], selected_programs_to_compare: List[str]) -> Iterator[ComparisonPair]:
+        """Lazily yields comparison pairs of code units of different programs. Pairs of the same programs are always generated in the same order."""
+        asts: List[Tuple[TokenizedProgram, CodeUnit]] = []
 
         if self.__compare_whole_programs__:
             for program in programs:
+                if id(program) in self.__merged_code_units__:
+                    asts.append((program, self.__merged_code_units__[id(program)]))
+                    continue
                 merged_code_units = []
                 for code_unit in program.code_units:
                     merged_code_units += code_unit.ast
-                asts.append((program, merged_code_units))
+                # Fingerprints of merged code units are approximated by union of fingerprints of all code units.
+                fingerprints = None
+                if program.code_units and all(code_unit.fingerprints is not None for code_unit in program.code_units):
+                    fingerprints = np.unique(np.concatenate([code_unit.fingerprints for code_unit in program.code_units]))
+                kinds_histogram = None
+                if program.code_units and all(code_unit.kinds_histogram is not None for code_unit in program.code_units):
+                    kinds_histogram = np.sum([code_unit.kinds_histogram for code_unit in program.code_units], axis=0)
+                self.__merged_code_units__[id(program)] = CodeUnit(merged_code_units, fingerprints, kinds_histogram)
+                asts.append((program, self.__merged_code_units__[id(program)]))
         else:
             for program in programs:
                 for code_unit in program.code_units:
-                    asts.append((program, code_unit.ast))
+                    asts.append((program, code_unit))
 
-        asts = sorted(asts, key=lambda x: (x[0].author, x[1][0].name), reverse=True)
-        comparison_pairs: List[ComparisonPair] = []
-        for pair in itertools.combinations(asts, 2):
-            (program_a, ast_a), (program_b, ast_b) = pair
+        asts = sorted(asts, key=lambda x: (x[0].author, x[1].ast[0].name), reverse=True)
+        for i, j in self.__generate_candidates__(asts):
+            (program_a, code_unit_a), (program_b, code_unit_b) = asts[i], asts[j]
 
             if selected_programs_to_compare:
                 if not (program_a.author in selected_programs_to_compare or program_b.author in selected_programs_to_compare):
@@ -40,21 +113,4 @@ class ComparisonPairsGenerator:
             if program_a is program_b:
                 continue
 
-            if (
-                self.__max_number_of_differences_in_single_comparison_pair__ != -1
-                and abs(len(ast_a) - len(ast_b)) > self.__max_number_of_differences_in_single_comparison_pair__
-            ):
-                continue
-
-            if ast_a[0].token_kind != ast_b[0].token_kind:
-                continue
-
-            if self.__assign_functions_based_on_types__:
-                if ast_a[0].name != ast_b[0].name:
-                    continue
-                if ast_a[0].type_name != ast_b[0].type_name:
-                    continue
-
-            comparison_pairs.append(ComparisonPair(program_a, program_b, ast_a, ast_b))
-
-        return comparison_pairs
+            yield ComparisonPair(program_a, program_b, code_unit_a.ast, code_unit_b.ast, code_unit_a, code_unit_b)
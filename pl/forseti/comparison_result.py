@@ -1,4 +1,5 @@
 from dataclasses import dataclass, field
+import numpy as np
 from .comparison_pair import ComparisonPair
 
 
@@ -8,3 +9,33 @@ class ComparisonResult:
     result: None
     matches_a: None
     matches_b: None
+    below_similarity_floor: bool = False
+
+
+@dataclass
+class CompactComparisonResult:
+    """Comparison result returned by worker processes, which does not reference any program.
+    Tiles are rows of (position of token A, position of token B, length) and marks are packed into bitsets."""
+
+    tiles: np.ndarray
+    marked_tokens_a: int
+    marked_tokens_b: int
+    packed_marks_a: np.ndarray = None
+    packed_marks_b: np.ndarray = None
+    below_similarity_floor: bool = False
+
+    @staticmethod
+    def pack(tiles, marks_a: np.ndarray, marks_b: np.ndarray) -> "CompactComparisonResult":
+        tiles = np.array([(tile["position_of_token_A"], tile["position_of_token_B"], tile["length"]) for tile in tiles], dtype=np.int32).reshape(-1, 3)
+        return CompactComparisonResult(tiles, int(np.count_nonzero(marks_a)), int(np.count_nonzero(marks_b)), np.packbits(marks_a), np.packbits(marks_b))
+
+    def rehydrate(self, pair: ComparisonPair) -> ComparisonResult:
+        """Returns full result of given pair. Pair comes from the parent process, so it references its programs."""
+        length_a, length_b = len(pair.tokens_a), len(pair.tokens_b)
+        if self.packed_marks_a is None:
+            marks_a, marks_b = np.zeros(length_a, dtype=np.bool_), np.zeros(length_b, dtype=np.bool_)
+        else:
+            marks_a = np.unpackbits(self.packed_marks_a, count=length_a).astype(np.bool_)
+            marks_b = np.unpackbits(self.packed_marks_b, count=length_b).astype(np.bool_)
+        tiles = [{"position_of_token_A": int(a), "position_of_token_B": int(b), "length": int(length)} for a, b, length in self.tiles]
+        return ComparisonResult(pair, tiles, marks_a, marks_b, self.below_similarity_floor)
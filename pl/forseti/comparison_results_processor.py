@@ -1,7 +1,7 @@
-from typing import Dict
+from typing import Dict, List, Tuple
+import collections
 import logging
 import dataclasses
-import copy
 import numpy as np
 
 from .tokenized_program import TokenizedProgram
@@ -14,11 +14,100 @@ class ComparisonResultsProcessorConfig:
     maximal_similarity_threshold: float = 1.0
 
 
+class RunningStatistics:
+    """Minimum, mean and (population) standard deviation of values added one by one (Welford's algorithm)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.minimum = float("inf")
+        self.mean = 0.0
+        self.__squared_deviations = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.minimum = min(self.minimum, value)
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.__squared_deviations += delta * (value - self.mean)
+
+    @property
+    def std(self) -> float:
+        return (self.__squared_deviations / self.count) ** 0.5 if self.count else 0.0
+
+
+class CodeUnitMatchesGroup:
+    """Consecutive matches of code units with the same name of the first code unit."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        # The first best of matches, which are never replaced, as (position, key, data).
+        self.best: Tuple[int, Tuple[str, str], Dict] = None
+        # Matches, which can be replaced by later ones, by their keys, as (position, data).
+        self.replaceable: Dict[Tuple[str, str], Tuple[int, Dict]] = {}
+
+
+class BestCodeUnitMatches:
+    """Best matches of code units of one program to code units of another program, reduced while they are added.
+
+    Matches are kept in order of their keys (names of both code units) and consecutive matches with the same name of the first code unit
+    form a group. Only the best match of every group is needed, but a match added again with the same key replaces the previous one,
+    so such matches are kept until the end. Other matches are dropped as soon as they are not the best in their group."""
+
+    def __init__(self) -> None:
+        self.__groups: List[CodeUnitMatchesGroup] = []
+        self.__groups_of_replaceable_keys: Dict[Tuple[str, str], CodeUnitMatchesGroup] = {}
+        self.__size = 0
+
+    def add(self, key: Tuple[str, str], data: Dict, replaceable: bool) -> None:
+        if key in self.__groups_of_replaceable_keys:
+            group = self.__groups_of_replaceable_keys[key]
+            group.replaceable[key] = (group.replaceable[key][0], data)
+            return
+
+        if not self.__groups or self.__groups[-1].name != key[0]:
+            self.__groups.append(CodeUnitMatchesGroup(key[0]))
+        group = self.__groups[-1]
+        position = self.__size
+        self.__size += 1
+        if replaceable:
+            group.replaceable[key] = (position, data)
+            self.__groups_of_replaceable_keys[key] = group
+        elif group.best is None or group.best[2]["similarity"] < data["similarity"]:
+            group.best = (position, key, data)
+
+    def __best_of_group__(self, group: CodeUnitMatchesGroup) -> Tuple[int, Tuple[str, str], Dict]:
+        candidates = [(position, key, data) for key, (position, data) in group.replaceable.items()]
+        if group.best is not None:
+            candidates.append(group.best)
+        candidates.sort(key=lambda candidate: candidate[0])
+        best = candidates[0]
+        for candidate in candidates:
+            if best[2]["similarity"] < candidate[2]["similarity"]:
+                best = candidate
+        return best
+
+    def best_matches(self) -> Dict[Tuple[str, str], Dict]:
+        """Returns the best match of every group, except the last one. If there is only one match, it is returned as it is."""
+        if self.__size <= 1:
+            return {key: data for group in self.__groups for _, key, data in [self.__best_of_group__(group)]}
+        return {key: data for group in self.__groups[:-1] for _, key, data in [self.__best_of_group__(group)]}
+
+
 class ComparisonResultsProcessor:
     def __init__(self, raw_comparison_results, config: ComparisonResultsProcessorConfig) -> None:
-        self.__raw_comparison_results = raw_comparison_results
+        """Results can be passed all at once (raw_comparison_results) or one by one using add and finalize, if raw_comparison_results is None.
+        In the latter case raw results are not kept, only their summaries for every pair of authors."""
         self.__config = config
-        self.__similarity_threshold, self.__processed_results, self.__programs = self.__proces_comparison_results__(self.__raw_comparison_results)
+        self.__programs: Dict[str, TokenizedProgram] = {}
+        # Numbers of code units of every program with the same name, so matches which can be added again with the same key are known in advance.
+        self.__names_of_code_units: Dict[str, collections.Counter] = {}
+        self.__program_to_program = {}
+        self.__similarity_threshold = 0.0
+        self.__processed_results = {}
+        if raw_comparison_results is not None:
+            for comparison_result in raw_comparison_results:
+                self.add(comparison_result)
+            self.finalize()
 
     @property
     def similarity_treshold(self):
@@ -94,108 +183,94 @@ class ComparisonResultsProcessor:
 
         return metrics
 
-    def __proces_comparison_results__(self, raw_comparison_results):
-        programs: Dict[str, TokenizedProgram] = {}
-        program_to_program = {}
-        for elem in raw_comparison_results:
-            pair = elem.pair
-
-            if pair.program_a.author not in program_to_program:
-                program_to_program[pair.program_a.author] = {}
-                programs[pair.program_a.author] = pair.program_a
-            if pair.program_b.author not in program_to_program:
-                program_to_program[pair.program_b.author] = {}
-                programs[pair.program_b.author] = pair.program_b
-
-            stats_prototype = {}
-
-            stats_prototype["similarity"] = 0.0
-            stats_prototype["coverage_A"] = 0.0
-            stats_prototype["coverage_B"] = 0.0
-            stats_prototype["code_unit_matches"] = {}
-
-            program_to_program[pair.program_a.author][pair.program_b.author] = copy.deepcopy(stats_prototype)
-            program_to_program[pair.program_b.author][pair.program_a.author] = copy.deepcopy(stats_prototype)
-
-        for comparison_result in raw_comparison_results:
-            matches_a, matches_b, pair, raw_comparison_result = (
-                comparison_result.matches_a,
-                comparison_result.matches_b,
-                comparison_result.pair,
-                comparison_result.result,
-            )
-            a_to_b_data = {}
-            a_to_b_data["similarity"] = 0.0
-            a_to_b_data["coverage_A"] = 0.0
-            a_to_b_data["coverage_B"] = 0.0
-
-            a_to_b_data["temp_matches_A"] = a_to_b_data["coverage_A"] = np.sum(matches_a)
-            a_to_b_data["temp_matches_B"] = a_to_b_data["coverage_B"] = np.sum(matches_b)
-            a_to_b_data["matches"] = []
-            a_to_b_data["matched_tokens"] = 0
-            if raw_comparison_result:
-                for raw_code_unit_entry in raw_comparison_result:
-                    a_to_b_data["matches"].append(
-                        {
-                            "position_A": raw_code_unit_entry["position_of_token_A"],
-                            "position_B": raw_code_unit_entry["position_of_token_B"],
-                            "length": raw_code_unit_entry["length"],
-                        }
-                    )
-                    a_to_b_data["matched_tokens"] += raw_code_unit_entry["length"]
-
-            b_to_a_data = {}
-            b_to_a_data["temp_matches_A"] = b_to_a_data["coverage_A"] = a_to_b_data["coverage_B"]
-            b_to_a_data["temp_matches_B"] = b_to_a_data["coverage_B"] = a_to_b_data["coverage_A"]
-            b_to_a_data["matches"] = []
-            b_to_a_data["matched_tokens"] = 0
-
-            if raw_comparison_result:
-                for raw_code_unit_entry in raw_comparison_result:
-                    b_to_a_data["matches"].append(
-                        {
-                            "position_A": raw_code_unit_entry["position_of_token_B"],
-                            "position_B": raw_code_unit_entry["position_of_token_A"],
-                            "length": raw_code_unit_entry["length"],
-                        }
-                    )
-
-            b_to_a_data["matched_tokens"] = a_to_b_data["matched_tokens"]
-            a_to_b_data["coverage_B"] /= len(matches_a)
-            b_to_a_data["coverage_A"] = a_to_b_data["coverage_B"]
-            a_to_b_data["coverage_A"] /= len(matches_b)
-            b_to_a_data["coverage_B"] = a_to_b_data["coverage_A"]
-
-            a_to_b_data["similarity"] = (a_to_b_data["matched_tokens"] * 2) / (len(matches_a) + len(matches_b))
-            b_to_a_data["similarity"] = a_to_b_data["similarity"]
-
-            a_to_b_key = (pair.tokens_a[0].name, pair.tokens_b[0].name)
-            program_to_program[pair.program_a.author][pair.program_b.author]["code_unit_matches"][a_to_b_key] = a_to_b_data
-            b_to_a_key = (pair.tokens_b[0].name, pair.tokens_a[0].name)
-            program_to_program[pair.program_b.author][pair.program_a.author]["code_unit_matches"][b_to_a_key] = b_to_a_data
-
-        similarities = []
+    def add(self, comparison_result) -> None:
+        """Folds result of a single comparison pair into results of its authors."""
+        program_to_program = self.__program_to_program
+        pair = comparison_result.pair
+
+        for program in [pair.program_a, pair.program_b]:
+            if program.author not in program_to_program:
+                program_to_program[program.author] = {}
+                self.__programs[program.author] = program
+                self.__names_of_code_units[program.author] = collections.Counter(code_unit.ast[0].name for code_unit in program.code_units if code_unit.ast)
+
+        for author_a, author_b in [(pair.program_a.author, pair.program_b.author), (pair.program_b.author, pair.program_a.author)]:
+            if author_b not in program_to_program[author_a]:
+                stats_prototype = {}
+
+                stats_prototype["similarity"] = 0.0
+                stats_prototype["coverage_A"] = 0.0
+                stats_prototype["coverage_B"] = 0.0
+                stats_prototype["code_unit_matches"] = BestCodeUnitMatches()
+
+                program_to_program[author_a][author_b] = stats_prototype
+
+        matches_a, matches_b, raw_comparison_result = (
+            comparison_result.matches_a,
+            comparison_result.matches_b,
+            comparison_result.result,
+        )
+        a_to_b_data = {}
+        a_to_b_data["similarity"] = 0.0
+        a_to_b_data["coverage_A"] = 0.0
+        a_to_b_data["coverage_B"] = 0.0
+
+        a_to_b_data["temp_matches_A"] = a_to_b_data["coverage_A"] = np.sum(matches_a)
+        a_to_b_data["temp_matches_B"] = a_to_b_data["coverage_B"] = np.sum(matches_b)
+        a_to_b_data["matches"] = []
+        a_to_b_data["matched_tokens"] = 0
+        if raw_comparison_result:
+            for raw_code_unit_entry in raw_comparison_result:
+                a_to_b_data["matches"].append(
+                    {
+                        "position_A": raw_code_unit_entry["position_of_token_A"],
+                        "position_B": raw_code_unit_entry["position_of_token_B"],
+                        "length": raw_code_unit_entry["length"],
+                    }
+                )
+                a_to_b_data["matched_tokens"] += raw_code_unit_entry["length"]
+
+        b_to_a_data = {}
+        b_to_a_data["temp_matches_A"] = b_to_a_data["coverage_A"] = a_to_b_data["coverage_B"]
+        b_to_a_data["temp_matches_B"] = b_to_a_data["coverage_B"] = a_to_b_data["coverage_A"]
+        b_to_a_data["matches"] = []
+        b_to_a_data["matched_tokens"] = 0
+
+        if raw_comparison_result:
+            for raw_code_unit_entry in raw_comparison_result:
+                b_to_a_data["matches"].append(
+                    {
+                        "position_A": raw_code_unit_entry["position_of_token_B"],
+                        "position_B": raw_code_unit_entry["position_of_token_A"],
+                        "length": raw_code_unit_entry["length"],
+                    }
+                )
+
+        b_to_a_data["matched_tokens"] = a_to_b_data["matched_tokens"]
+        a_to_b_data["coverage_B"] /= len(matches_a)
+        b_to_a_data["coverage_A"] = a_to_b_data["coverage_B"]
+        a_to_b_data["coverage_A"] /= len(matches_b)
+        b_to_a_data["coverage_B"] = a_to_b_data["coverage_A"]
+
+        a_to_b_data["similarity"] = (a_to_b_data["matched_tokens"] * 2) / (len(matches_a) + len(matches_b))
+        b_to_a_data["similarity"] = a_to_b_data["similarity"]
+
+        a_to_b_key = (pair.tokens_a[0].name, pair.tokens_b[0].name)
+        b_to_a_key = (pair.tokens_b[0].name, pair.tokens_a[0].name)
+        replaceable = self.__names_of_code_units[pair.program_a.author][a_to_b_key[0]] * self.__names_of_code_units[pair.program_b.author][b_to_a_key[0]] != 1
+        program_to_program[pair.program_a.author][pair.program_b.author]["code_unit_matches"].add(a_to_b_key, a_to_b_data, replaceable)
+        program_to_program[pair.program_b.author][pair.program_a.author]["code_unit_matches"].add(b_to_a_key, b_to_a_data, replaceable)
+
+    def finalize(self) -> None:
+        """Aggregates results of all added comparison pairs and computes similarity threshold."""
+        program_to_program = self.__program_to_program
+        programs = self.__programs
+        # Statistics are computed in a single pass, without keeping similarities of all pairs of authors.
+        statistics = RunningStatistics()
 
         for compared_to_name, compared_to in program_to_program.items():
             for compared_program_name, compared_program in compared_to.items():
-                filtered_matches = {}
-                all_matches = list(compared_program["code_unit_matches"].items())
-                if len(all_matches) <= 1:
-                    continue
-
-                current_name = all_matches[0][0][0]
-                best_match = all_matches[0]
-                for names, matches in all_matches:
-                    if current_name != names[0]:
-                        current_name = names[0]
-                        filtered_matches[best_match[0]] = best_match[1]
-                        best_match = (names, matches)
-                        continue
-
-                    if best_match[1]["similarity"] < matches["similarity"]:
-                        best_match = (names, matches)
-
-                compared_program["code_unit_matches"] = filtered_matches
+                compared_program["code_unit_matches"] = compared_program["code_unit_matches"].best_matches()
 
         for compared_to_name, compared_to in program_to_program.items():
             for compared_program_name, compared_program in compared_to.items():
@@ -217,14 +292,15 @@ class ComparisonResultsProcessor:
                 compared_program["coverage_A"] = (coverage_A / number_of_all_tokens_of_program_A, matched_tokens, number_of_all_tokens_of_program_A)
                 compared_program["coverage_B"] = (coverage_B / number_of_all_tokens_of_program_B, matched_tokens, number_of_all_tokens_of_program_B)
                 compared_program["similarity"] = (coverage_A + coverage_B) / (number_of_all_tokens_of_program_A + number_of_all_tokens_of_program_B)
-                similarities.append(compared_program["similarity"])
+                statistics.add(compared_program["similarity"])
 
-        if len(similarities):
-            sd = np.std(np.array(similarities), axis=0)
-            similarity_threshold = min((min(similarities) + self.__config.minimal_similarity_threshold + sd * 2), self.__config.maximal_similarity_threshold)
+        if statistics.count:
+            similarity_threshold = min(
+                (statistics.minimum + self.__config.minimal_similarity_threshold + statistics.std * 2), self.__config.maximal_similarity_threshold
+            )
         else:
             similarity_threshold = 0.0
 
         logging.info(f"Minimal similarity threshold: {self.__config.minimal_similarity_threshold}")
         logging.info(f"Similarity threshold: {similarity_threshold}")
-        return (similarity_threshold, program_to_program, programs)
+        self.__similarity_threshold, self.__processed_results = similarity_threshold, program_to_program
@@ -0,0 +1,79 @@
+import dataclasses
+import logging
+import os
+from typing import Dict, Iterator, List
+
+from .code_tokenizer import CodeTokenizer
+from .code_units_serialization import load_tokenized_programs, save_tokenized_programs
+from .comparison_result import ComparisonResult
+from .detection_config import DetectionConfig
+from .detection_engine import DetectionEngine
+from .program import Program
+from .tokenized_program import TokenizedProgram
+
+PROGRAMS_FILENAME = "programs.bin"
+RESULTS_FILENAME = "results.sqlite"
+
+
+class Corpus:
+    """Persistent set of tokenized programs with results of their comparisons, stored in a directory.
+
+    Programs added in previous runs are not parsed again. Results of their comparison pairs are kept in pair results cache of the corpus,
+    so adding new programs requires comparing only pairs with at least one new program. Aggregates are computed from all results again."""
+
+    def __init__(self, path: str) -> None:
+        self.__path = path
+        os.makedirs(path, exist_ok=True)
+        self.__programs: Dict[str, TokenizedProgram] = {}
+        if os.path.exists(self.__programs_path):
+            self.__programs = {program.author: program for program in load_tokenized_programs(self.__programs_path)}
+        logging.info(f"{len(self.__programs)} programs loaded from corpus {path}.")
+
+    @property
+    def __programs_path(self) -> str:
+        return os.path.join(self.__path, PROGRAMS_FILENAME)
+
+    @property
+    def results_path(self) -> str:
+        return os.path.join(self.__path, RESULTS_FILENAME)
+
+    @property
+    def authors(self) -> List[str]:
+        return list(self.__programs)
+
+    def add_programs(self, programs_sets: List[Program], code_tokenizer: CodeTokenizer) -> List[str]:
+        """Tokenizes and stores programs. Program of an author, who is already in the corpus, replaces the previous one.
+        Returns authors of added programs."""
+        tokenized_programs = code_tokenizer.parse_programs(programs_sets)
+        for tokenized_program in tokenized_programs:
+            if tokenized_program.author in self.__programs:
+                logging.info(f"Program of {tokenized_program.author} is replaced in corpus.")
+            self.__programs[tokenized_program.author] = tokenized_program
+        self.save()
+        return [tokenized_program.author for tokenized_program in tokenized_programs]
+
+    def remove_programs(self, authors: List[str]) -> None:
+        for author in authors:
+            self.__programs.pop(author, None)
+        self.save()
+
+    def save(self) -> None:
+        save_tokenized_programs(self.__programs_path, list(self.__programs.values()))
+
+    def tokenized_programs(self) -> List[TokenizedProgram]:
+        """Returns copies of stored programs read from the corpus file - detection flattens code units of programs in place."""
+        if not self.__programs:
+            return []
+        return load_tokenized_programs(self.__programs_path)
+
+    def analyze_stream(
+        self,
+        config: DetectionConfig = DetectionConfig(),
+        selected_programs_to_compare: List[str] = [],
+        baseline_programs: List[TokenizedProgram] = [],
+    ) -> Iterator[ComparisonResult]:
+        """Compares all programs of the corpus. Results of pairs compared in previous runs are read from the corpus,
+        unless another pair results cache is configured."""
+        if not config.pair_results_cache_path:
+            config = dataclasses.replace(config, pair_results_cache_path=self.results_path)
+        return DetectionEngine().analyze_stream(self.tokenized_programs(), config, selected_programs_to_compare, baseline_programs)
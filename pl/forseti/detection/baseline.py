@@ -0,0 +1,25 @@
+import numpy as np
+
+from .gst import gst
+from .prepared_sequence import PreparedSequence
+from .scanpattern import NUMPY_HASHING
+from .suffix_array_gst import suffix_array_gst, SUFFIX_ARRAY_GST_ENGINE
+from .tiles_manager import TilesManager
+
+
+def find_baseline_marks(
+    sequence: PreparedSequence,
+    baseline: PreparedSequence,
+    gst_engine: str,
+    minimal_search_length: int,
+    initial_search_length: int,
+    hashing_method: str = NUMPY_HASHING,
+) -> np.ndarray:
+    """Returns marks of tokens of sequence, which are covered by tiles matched with baseline (starter) code."""
+    tiles = TilesManager(sequence)
+    baseline_tiles = TilesManager(baseline)
+    if gst_engine == SUFFIX_ARRAY_GST_ENGINE:
+        suffix_array_gst(tiles, baseline_tiles, minimal_search_length)
+    else:
+        gst(tiles, baseline_tiles, minimal_search_length, initial_search_length, hashing_method)
+    return tiles.marks.copy()
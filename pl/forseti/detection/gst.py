@@ -1,26 +1,58 @@
 from operator import eq
+from typing import List
 from .tiles_manager import TilesManager
-from .scanpattern import scanpattern, mark_arrays, check_matches
+from .scanpattern import scanpattern, mark_arrays, check_matches, NUMPY_HASHING
+from .window_hash_index import WindowHashIndex
+from .similarity_bound import maximal_similarity
 
 
-def gst(pattern: TilesManager, source: TilesManager, minimal_search_length: int, initial_search_length: int):
+def get_search_lengths(minimal_search_length: int, initial_search_length: int) -> List[int]:
+    """Returns search lengths used by gst passes, unless a very long match restarts detection with a longer one."""
+    search_lengths = [initial_search_length]
+    while search_lengths[-1] > minimal_search_length * 2:
+        search_lengths.append(search_lengths[-1] >> 1)
+    return search_lengths
+
+
+def gst(
+    pattern: TilesManager,
+    source: TilesManager,
+    minimal_search_length: int,
+    initial_search_length: int,
+    hashing_method: str = NUMPY_HASHING,
+    similarity_floor: float = -1,
+):
+    """Running-Karp-Rabin greedy string tiling. If similarity_floor is set and the pair cannot reach it anymore, detection is abandoned and None is returned."""
     search_length = initial_search_length
     tiles = []
     max_matches = []
     search_length_list = []
     max_iterations = 10
     counter = 0
+    # Hash indexes are kept for every used search length and only invalidated by new tiles, so next passes do not rehash sequences.
+    hash_indexes = {}
     while counter < max_iterations:
         search_length_list.append(search_length)
-        longest_match = scanpattern(pattern, source, search_length, max_matches)
+        hash_index = None
+        if hashing_method == NUMPY_HASHING:
+            if search_length not in hash_indexes:
+                hash_indexes[search_length] = WindowHashIndex(pattern, source, search_length)
+            hash_index = hash_indexes[search_length]
+        longest_match = scanpattern(pattern, source, search_length, max_matches, hashing_method, hash_index)
 
         if longest_match > search_length * 2:
             # For very long matches restart detection to avoid subset matches
             search_length = longest_match
             continue
 
+        number_of_tiles = len(tiles)
         mark_arrays(pattern, source, max_matches, tiles)
+        for tile in tiles[number_of_tiles:]:
+            for index in hash_indexes.values():
+                index.invalidate(tile["position_of_token_A"], tile["position_of_token_B"], tile["length"])
         max_matches = []
+        if similarity_floor > 0 and maximal_similarity(pattern, source, minimal_search_length, sum(tile["length"] for tile in tiles)) < similarity_floor:
+            return None
         if search_length > minimal_search_length * 2:
             search_length >>= 1
         elif search_length > initial_search_length:
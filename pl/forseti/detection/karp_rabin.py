@@ -0,0 +1,93 @@
+from typing import List
+import numpy as np
+
+# All hashes are computed modulo 2^64, so NumPy uint64 arithmetic (which wraps around on overflow) can be used directly.
+# Base is odd, hence it has a multiplicative inverse modulo 2^64.
+BASE = 0x9E3779B97F4A7C15
+INVERSE_BASE = pow(BASE, -1, 1 << 64)
+MASK = (1 << 64) - 1
+
+
+def powers(base: int, count: int) -> np.ndarray:
+    """Returns [base^0, base^1, ..., base^(count-1)] modulo 2^64."""
+    result = np.full(count, base, dtype=np.uint64)
+    if count:
+        result[0] = 1
+    return np.cumprod(result, dtype=np.uint64)
+
+
+# Powers depend only on sequence length, so they are shared by all sequences of the process and extended when needed.
+_powers_cache = {BASE: np.ones(1, dtype=np.uint64), INVERSE_BASE: np.ones(1, dtype=np.uint64)}
+
+
+def cached_powers(base: int, count: int) -> np.ndarray:
+    """Returns [base^0, base^1, ..., base^(count-1)] modulo 2^64 for BASE or INVERSE_BASE. Returned array must not be modified."""
+    if len(_powers_cache[base]) < count:
+        _powers_cache[base] = powers(base, max(count, 2 * len(_powers_cache[base])))
+    return _powers_cache[base][:count]
+
+
+class KarpRabinHashes:
+    """Polynomial hashes of all windows of a sequence of token codes.
+
+    Hash of tokens c[i], ..., c[i + l - 1] is sum(c[i + k] * BASE^(l - 1 - k)), so hashes of equal windows are equal in every sequence.
+    Prefix sums of c[j] * INVERSE_BASE^j are stored, hence hash of any window is a difference of two prefixes multiplied by a power of BASE.
+    """
+
+    def __init__(self, tokens: np.ndarray, prefixes: np.ndarray = None) -> None:
+        """Prefixes computed earlier for the same tokens (e.g. by another process) can be passed, so they are not computed again."""
+        self.size = len(tokens)
+        if prefixes is not None:
+            self.__prefixes = prefixes
+        else:
+            self.__prefixes = np.zeros(self.size + 1, dtype=np.uint64)
+            np.cumsum((tokens.astype(np.uint64) + np.uint64(1)) * cached_powers(INVERSE_BASE, self.size), dtype=np.uint64, out=self.__prefixes[1:])
+        # Python copies of arrays for single substring queries - indexing NumPy arrays one by one is much slower than indexing lists.
+        self.__powers_list: List[int] = None
+        self.__prefixes_list: List[int] = None
+
+    @property
+    def prefixes(self) -> np.ndarray:
+        return self.__prefixes
+
+    def normalized_substring_hash(self, begin: int, length: int) -> int:
+        """Returns hash of tokens in range [begin, begin + length) divided by BASE^(length - 1).
+        It is enough to compare substrings of the same length and it is cheaper than substring_hash."""
+        if self.__prefixes_list is None:
+            self.__powers_list = cached_powers(BASE, self.size + 1).tolist()
+            self.__prefixes_list = self.__prefixes.tolist()
+        return ((self.__prefixes_list[begin + length] - self.__prefixes_list[begin]) * self.__powers_list[begin]) & MASK
+
+    def substring_hash(self, begin: int, length: int) -> int:
+        """Returns hash of tokens in range [begin, begin + length) in O(1)."""
+        if length <= 0:
+            return 0
+        return (self.normalized_substring_hash(begin, length) * self.__powers_list[length - 1]) & MASK
+
+    def window_hashes(self, length: int) -> np.ndarray:
+        """Returns hashes of all windows of given length; i-th element is the hash of window which starts at position i."""
+        if length > self.size or length <= 0:
+            return np.empty(0, dtype=np.uint64)
+        window_sums = self.__prefixes[length:] - self.__prefixes[: self.size - length + 1]
+        return window_sums * cached_powers(BASE, self.size)[length - 1 :]
+
+
+def longest_common_extension(hashes_a: KarpRabinHashes, begin_a: int, hashes_b: KarpRabinHashes, begin_b: int, limit: int) -> int:
+    """Returns length of the longest common prefix (not longer than limit) of sequences starting at begin_a and begin_b.
+
+    Lengths 1, 2, 4, ... are checked (galloping) until the first mismatch, then exact length is found with binary search,
+    so only O(log(length)) hashes are compared."""
+    hash_a = hashes_a.normalized_substring_hash
+    hash_b = hashes_b.normalized_substring_hash
+    low, high = 0, 1
+    while high <= limit and hash_a(begin_a, high) == hash_b(begin_b, high):
+        low, high = high, high << 1
+    # Prefix of length low is common, prefix of length high is not (or it exceeds limit).
+    high = min(high, limit + 1)
+    while high - low > 1:
+        middle = (low + high) >> 1
+        if hash_a(begin_a, middle) == hash_b(begin_b, middle):
+            low = middle
+        else:
+            high = middle
+    return low
@@ -0,0 +1,59 @@
+import logging
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from ..comparison_result import CompactComparisonResult
+from ..utils.sqlite_lru_store import SqliteLruStore
+
+
+class PairResultCache:
+    """Persistent cache of results of comparison pairs, stored in SQLite database.
+
+    Results are keyed by hashes of both compared sequences and of detection configuration (see DetectionEngine), so they can be reused by
+    later runs on the same (or partially changed) corpus. If the database grows over max_size bytes, least recently used results are evicted.
+    """
+
+    def __init__(self, path: str, max_size: int = 256 * 1024 * 1024) -> None:
+        self.__store = SqliteLruStore(
+            path,
+            "results",
+            "BLOB",
+            ["tiles BLOB", "marked_tokens_a INTEGER", "marked_tokens_b INTEGER", "marks_a BLOB", "marks_b BLOB", "below_similarity_floor INTEGER"],
+            max_size,
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[bytes]) -> Dict[bytes, CompactComparisonResult]:
+        """Returns cached results of given keys. Keys, which are not in the cache, are skipped."""
+        keys = list(keys)
+        results: Dict[bytes, CompactComparisonResult] = {}
+        for key, (tiles, marked_tokens_a, marked_tokens_b, marks_a, marks_b, below_similarity_floor) in self.__store.get_many(keys).items():
+            results[key] = CompactComparisonResult(
+                np.frombuffer(tiles, dtype=np.int32).reshape(-1, 3),
+                marked_tokens_a,
+                marked_tokens_b,
+                None if marks_a is None else np.frombuffer(marks_a, dtype=np.uint8),
+                None if marks_b is None else np.frombuffer(marks_b, dtype=np.uint8),
+                bool(below_similarity_floor),
+            )
+        self.hits += len(results)
+        self.misses += len(keys) - len(results)
+        return results
+
+    def put_many(self, results: List[tuple]) -> None:
+        """Stores (key, result) pairs and evicts least recently used results, if the cache is too big."""
+        rows = []
+        for key, result in results:
+            tiles = result.tiles.astype(np.int32).tobytes()
+            marks_a = None if result.packed_marks_a is None else result.packed_marks_a.tobytes()
+            marks_b = None if result.packed_marks_b is None else result.packed_marks_b.tobytes()
+            size = len(key) + len(tiles) + len(marks_a or b"") + len(marks_b or b"")
+            rows.append((key, (tiles, result.marked_tokens_a, result.marked_tokens_b, marks_a, marks_b, int(result.below_similarity_floor)), size))
+        evicted = self.__store.put_many(rows)
+        if evicted:
+            logging.info(f"{evicted} results evicted from pair results cache.")
+
+    def close(self) -> None:
+        self.__store.close()
@@ -0,0 +1,28 @@
+from typing import Dict, Iterable, Optional
+import numpy as np
+
+from .karp_rabin import KarpRabinHashes
+
+
+class PreparedSequence:
+    """Code unit prepared for comparisons: encoded tokens, their Karp-Rabin hashes and hashes of windows of configured search lengths.
+
+    It is built once per code unit and shared by all comparison pairs the unit takes part in. Only marks are per pair state (see TilesManager)."""
+
+    def __init__(self, tokens: np.ndarray, search_lengths: Iterable[int] = (), prefixes: np.ndarray = None) -> None:
+        self.tokens = tokens
+        self.hashes = KarpRabinHashes(tokens, prefixes)
+        self.__window_hashes: Dict[int, np.ndarray] = {length: self.hashes.window_hashes(length) for length in search_lengths}
+        # Tokens matched with baseline (starter) code, which are marked before comparisons, so they are never tiled.
+        self.baseline_marks: Optional[np.ndarray] = None
+        # Hash of string representations of tokens, independent of vocabulary. It is computed only if results are cached.
+        self.content_hash: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def window_hashes(self, length: int) -> np.ndarray:
+        """Returns hashes of all windows of given length. They are precomputed for configured search lengths only."""
+        if length in self.__window_hashes:
+            return self.__window_hashes[length]
+        return self.hashes.window_hashes(length)
@@ -1,67 +1,69 @@
 from collections import deque
 from .tiles_manager import TilesManager
+from .karp_rabin import longest_common_extension
+from .window_hash_index import WindowHashIndex
 from rolling import PolynomialHash
 from ..token import TokenKind
 
+ROLLING_HASHING = "rolling"
+NUMPY_HASHING = "numpy"
 
-def scanpattern(pattern: TilesManager, text: TilesManager, search_length: int, max_matches):
-    longest_match = 0
-    text_begin_idx = text.get_index_of_next_unmarked_token(0)
 
-    if text_begin_idx is None or (text_begin_idx and text_begin_idx + search_length > text.size):
-        return longest_match
+def hash_unmarked_windows(tiles: TilesManager, search_length: int):
+    """Yields (position, hash) of every window of search_length tokens without any marked token.
+    Only unmarked runs, which are long enough to contain a window, are hashed."""
+    for begin, end in tiles.unmarked_runs(search_length):
+        for i, current_hash in enumerate(PolynomialHash(tiles.tokens[begin:end].tolist(), search_length)):
+            yield begin + i, current_hash
 
-    pattern_begin_idx = pattern.get_index_of_next_unmarked_token(0)
-
-    if pattern_begin_idx is None or (pattern_begin_idx and pattern_begin_idx + search_length > pattern.size):
-        return longest_match
 
+def find_candidates_using_rolling_hash(pattern: TilesManager, text: TilesManager, search_length: int):
+    """Yields (pattern position, text positions) of unmarked windows with equal hashes, using pure Python rolling hash."""
     text_hash_to_positions = {}
 
-    text_hasher = PolynomialHash([text.tokens[i] for i in range(text_begin_idx, text.size)], search_length)
-    pattern_hasher = PolynomialHash([pattern.tokens[i] for i in range(pattern_begin_idx, pattern.size)], search_length)
-    for i, current_hash in enumerate(text_hasher):
-        text_idx = text_begin_idx + i
-        marked_token_idx = text.get_index_of_next_marked_token(text_idx)
-
-        # Skip tokens with at least 1 marks
-        if marked_token_idx and marked_token_idx < text_idx + search_length:
-            continue
-
+    # Windows with at least 1 marked token are skipped
+    for text_idx, current_hash in hash_unmarked_windows(text, search_length):
         if current_hash not in text_hash_to_positions:
             text_hash_to_positions[current_hash] = []
         text_hash_to_positions[current_hash].append(text_idx)
 
-    for i, current_hash in enumerate(pattern_hasher):
-        pattern_idx = pattern_begin_idx + i
-
-        marked_token_idx = pattern.get_index_of_next_marked_token(pattern_idx)
-
-        # Skip tokens with at least 1 marks
-        if marked_token_idx and marked_token_idx < pattern_idx + search_length:
-            continue
-
+    for pattern_idx, current_hash in hash_unmarked_windows(pattern, search_length):
         if current_hash not in text_hash_to_positions:
             # Mismatch, skip
             continue
+        yield pattern_idx, text_hash_to_positions[current_hash]
+
+
+def scanpattern(
+    pattern: TilesManager, text: TilesManager, search_length: int, max_matches, hashing_method: str = NUMPY_HASHING, hash_index: WindowHashIndex = None
+):
+    """Finds matches of unmarked tokens, which are at least search_length long.
+    If hash_index is passed, it is used instead of hashing both sequences again (it must be built for the same search_length)."""
+    longest_match = 0
+    text_begin_idx = text.get_index_of_next_unmarked_token(0)
+
+    if text_begin_idx is None or (text_begin_idx and text_begin_idx + search_length > text.size):
+        return longest_match
 
-        for text_idx in text_hash_to_positions[current_hash]:
-            pattern_token_j = pattern_idx + search_length
-            text_token_j = text_idx + search_length
-            matching_tokens = search_length
+    pattern_begin_idx = pattern.get_index_of_next_unmarked_token(0)
 
+    if pattern_begin_idx is None or (pattern_begin_idx and pattern_begin_idx + search_length > pattern.size):
+        return longest_match
+
+    if hash_index is not None:
+        candidates = hash_index.candidates()
+    elif hashing_method == NUMPY_HASHING:
+        candidates = WindowHashIndex(pattern, text, search_length).candidates()
+    elif hashing_method == ROLLING_HASHING:
+        candidates = find_candidates_using_rolling_hash(pattern, text, search_length)
+    else:
+        raise Exception(f"Unknown hashing method: {hashing_method}")
+
+    for pattern_idx, text_positions in candidates:
+        for text_idx in text_positions:
             # I assume that tokens are the same in range of search_length and I'm checking only tokens starting after search_length.
-            # Checking is also simplified (only token kind is compared), because I will compare then in details in mark_arrays function.
-            while (
-                pattern_token_j < pattern.size
-                and text_token_j < text.size
-                and not pattern.marks[pattern_token_j]
-                and not text.marks[text_token_j]
-                and pattern.tokens[pattern_token_j] == text.tokens[text_token_j]
-            ):
-                pattern_token_j += 1
-                text_token_j += 1
-                matching_tokens += 1
+            # Checking is also simplified (only hashes of token codes are compared), because I will compare then in details in mark_arrays function.
+            matching_tokens = search_length + count_matching_tokens(pattern, text, pattern_idx + search_length, text_idx + search_length)
 
             if matching_tokens > 2 * search_length:
                 # If match contains a lot of tokens there is probability that contains many smaller matches, taht are subset of it.
@@ -75,6 +77,12 @@ def scanpattern(pattern: TilesManager, text: TilesManager, search_length: int, m
     return longest_match
 
 
+def count_matching_tokens(pattern: TilesManager, text: TilesManager, pattern_idx: int, text_idx: int) -> int:
+    """Counts equal and unmarked tokens of both sequences, starting from given positions."""
+    limit = min(pattern.count_unmarked_tokens(pattern_idx), text.count_unmarked_tokens(text_idx))
+    return longest_common_extension(pattern.hashes, pattern_idx, text.hashes, text_idx, limit)
+
+
 def check_matches(matches, n1: int, n2: int) -> bool:
     """Checks, if matches are not coverageing.
     matches[0,1,2]: 0 pos of X token, 1 pos of Y token, 2 length of the match."""
@@ -91,17 +99,20 @@ def mark_arrays(pattern: TilesManager, text: TilesManager, matches, tiles):
     length = 0
 
     for pattern_idx, text_idx, l in matches:
-        is_match = all(
-            [
-                not all(pattern.marks[pattern_idx : pattern_idx + l]),
-                not all(text.marks[text_idx : text_idx + l]),
-                all([pattern.tokens[pattern_idx + i] == text.tokens[text_idx + i] for i in range(0, l)]),
-            ]
+        # Match is accepted, if both ranges have at least one unmarked token and their tokens are equal.
+        next_unmarked_pattern_idx = pattern.get_index_of_next_unmarked_token(pattern_idx)
+        next_unmarked_text_idx = text.get_index_of_next_unmarked_token(text_idx)
+        is_match = (
+            next_unmarked_pattern_idx is not None
+            and next_unmarked_pattern_idx < pattern_idx + l
+            and next_unmarked_text_idx is not None
+            and next_unmarked_text_idx < text_idx + l
+            and pattern.hashes.substring_hash(pattern_idx, l) == text.hashes.substring_hash(text_idx, l)
         )
         if is_match:
             # Mark all tokens
-            pattern.marks[pattern_idx : pattern_idx + l] = [True] * l
-            text.marks[text_idx : text_idx + l] = [True] * l
+            pattern.mark(pattern_idx, l)
+            text.mark(text_idx, l)
             length += l
             # if check_matches(tiles, pattern_idx, text_idx):
             tiles.append({"position_of_token_A": pattern_idx, "position_of_token_B": text_idx, "length": l})
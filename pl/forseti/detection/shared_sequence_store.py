@@ -0,0 +1,94 @@
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+from .prepared_sequence import PreparedSequence
+
+# Maximal number of sequences rebuilt from shared memory and kept by a single process.
+CACHED_SEQUENCES = 4096
+
+
+class SharedSequenceStore:
+    """Prepared sequences stored once in shared memory as flat arrays with offsets, so worker processes can read them without copying.
+
+    Block contains (in this order): Karp-Rabin prefixes of all sequences (every sequence has one prefix more than tokens), offsets of
+    sequences, encoded tokens, baseline marks and flags, which sequences have baseline marks. Store is created by the parent process
+    (create) and attached by workers using its descriptor (attach)."""
+
+    def __init__(self, memory: shared_memory.SharedMemory, number_of_sequences: int, number_of_tokens: int, search_lengths: Iterable[int] = ()) -> None:
+        self.__memory = memory
+        self.__number_of_sequences = number_of_sequences
+        self.__number_of_tokens = number_of_tokens
+        self.__search_lengths = list(search_lengths)
+        self.__cache: Dict[int, PreparedSequence] = {}
+
+        buffer = memory.buf
+        position = 0
+
+        def array(dtype, count: int) -> np.ndarray:
+            nonlocal position
+            result = np.ndarray(count, dtype=dtype, buffer=buffer, offset=position)
+            position += result.nbytes
+            return result
+
+        self.prefixes = array(np.uint64, number_of_tokens + number_of_sequences)
+        self.offsets = array(np.int64, number_of_sequences + 1)
+        self.tokens = array(np.int32, number_of_tokens)
+        self.baseline_marks = array(np.bool_, number_of_tokens)
+        self.has_baseline_marks = array(np.bool_, number_of_sequences)
+
+    @staticmethod
+    def __size__(number_of_sequences: int, number_of_tokens: int) -> int:
+        return 8 * (number_of_tokens + number_of_sequences) + 8 * (number_of_sequences + 1) + 4 * number_of_tokens + number_of_tokens + number_of_sequences
+
+    @staticmethod
+    def create(sequences: List[PreparedSequence]) -> "SharedSequenceStore":
+        """Copies sequences to a new block of shared memory. It must be unlinked by the creator, when workers do not need it anymore."""
+        number_of_tokens = sum(len(sequence) for sequence in sequences)
+        memory = shared_memory.SharedMemory(create=True, size=max(1, SharedSequenceStore.__size__(len(sequences), number_of_tokens)))
+        store = SharedSequenceStore(memory, len(sequences), number_of_tokens)
+        store.offsets[0] = 0
+        store.offsets[1:] = np.cumsum([len(sequence) for sequence in sequences])
+        for i, sequence in enumerate(sequences):
+            begin, end = store.offsets[i], store.offsets[i + 1]
+            store.tokens[begin:end] = sequence.tokens
+            store.prefixes[begin + i : end + i + 1] = sequence.hashes.prefixes
+            store.has_baseline_marks[i] = sequence.baseline_marks is not None
+            store.baseline_marks[begin:end] = sequence.baseline_marks if sequence.baseline_marks is not None else False
+        return store
+
+    @staticmethod
+    def attach(descriptor: Tuple[str, int, int], search_lengths: Iterable[int] = ()) -> "SharedSequenceStore":
+        """Attaches to a store created by another process. Window hashes of given search lengths are computed for every used sequence."""
+        name, number_of_sequences, number_of_tokens = descriptor
+        # Worker processes share resource tracker of the creator, so attached memory is released only once, when the creator unlinks it.
+        memory = shared_memory.SharedMemory(name=name)
+        return SharedSequenceStore(memory, number_of_sequences, number_of_tokens, search_lengths)
+
+    @property
+    def descriptor(self) -> Tuple[str, int, int]:
+        return self.__memory.name, self.__number_of_sequences, self.__number_of_tokens
+
+    def __len__(self) -> int:
+        return self.__number_of_sequences
+
+    def __getitem__(self, index: int) -> PreparedSequence:
+        """Returns prepared sequence, which arrays are views of the shared memory."""
+        if index not in self.__cache:
+            if len(self.__cache) >= CACHED_SEQUENCES:
+                self.__cache.clear()
+            begin, end = int(self.offsets[index]), int(self.offsets[index + 1])
+            sequence = PreparedSequence(self.tokens[begin:end], self.__search_lengths, self.prefixes[begin + index : end + index + 1])
+            if self.has_baseline_marks[index]:
+                sequence.baseline_marks = self.baseline_marks[begin:end]
+            self.__cache[index] = sequence
+        return self.__cache[index]
+
+    def close(self) -> None:
+        # Views of the buffer must be released before it is closed.
+        self.__cache.clear()
+        self.prefixes = self.offsets = self.tokens = self.baseline_marks = self.has_baseline_marks = None
+        self.__memory.close()
+
+    def unlink(self) -> None:
+        self.__memory.unlink()
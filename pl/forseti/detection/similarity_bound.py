@@ -0,0 +1,27 @@
+import numpy as np
+
+from .tiles_manager import TilesManager
+
+
+def maximal_similarity_of_tokens(tokens_a: np.ndarray, tokens_b: np.ndarray) -> float:
+    """Returns upper bound of similarity 2 * matched / (len_a + len_b) of two sequences of token codes, before any comparison.
+    Every matched token has an equal token in the other sequence, so number of matched tokens cannot exceed size of multiset intersection."""
+    if not len(tokens_a) or not len(tokens_b):
+        return 0.0
+    size = max(int(tokens_a.max()), int(tokens_b.max())) + 1
+    common_tokens = np.minimum(np.bincount(tokens_a, minlength=size), np.bincount(tokens_b, minlength=size)).sum()
+    return 2 * int(common_tokens) / (len(tokens_a) + len(tokens_b))
+
+
+def maximal_similarity(pattern: TilesManager, text: TilesManager, minimal_search_length: int, matched_tokens: int, overlapping_tiles: bool = True) -> float:
+    """Returns upper bound of similarity 2 * matched / (len_a + len_b), which still can be reached by partially tiled sequences.
+    Similarity sums lengths of tiles, so matched_tokens (sum of lengths of tiles found so far) is used instead of number of marked tokens.
+    Tiles are never shorter than minimal_search_length, so only unmarked runs of at least that length can be matched later.
+    If tiles can overlap (tiles of one gst pass need only a single unmarked token), a new tile can cover tokens matched by other tiles in one
+    of sequences, so unmarked tokens of both sequences are counted. Otherwise the sequence with less of them limits the bound."""
+    if not pattern.size or not text.size:
+        return 0.0
+    matchable_a = sum(end - begin for begin, end in pattern.unmarked_runs(minimal_search_length))
+    matchable_b = sum(end - begin for begin, end in text.unmarked_runs(minimal_search_length))
+    matchable = matchable_a + matchable_b if overlapping_tiles else min(matchable_a, matchable_b)
+    return 2 * (matched_tokens + matchable) / (pattern.size + text.size)
@@ -0,0 +1,57 @@
+import numpy as np
+
+
+def build_suffix_array(sequence: np.ndarray) -> np.ndarray:
+    """Returns starting positions of all suffixes of sequence in lexicographical order.
+    Suffixes are sorted by prefix doubling - every step sorts them by pairs of ranks of their halves, using NumPy."""
+    size = len(sequence)
+    rank = np.unique(sequence, return_inverse=True)[1].astype(np.int64).reshape(size)
+    suffix_array = np.argsort(rank, kind="stable")
+    length = 1
+    while length < size:
+        second_half_rank = np.full(size, -1, dtype=np.int64)
+        second_half_rank[: size - length] = rank[length:]
+        suffix_array = np.lexsort((second_half_rank, rank))
+
+        sorted_rank = rank[suffix_array]
+        sorted_second_half_rank = second_half_rank[suffix_array]
+        is_new_rank = np.empty(size, dtype=np.int64)
+        is_new_rank[0] = 0
+        is_new_rank[1:] = (sorted_rank[1:] != sorted_rank[:-1]) | (sorted_second_half_rank[1:] != sorted_second_half_rank[:-1])
+        rank = np.empty(size, dtype=np.int64)
+        rank[suffix_array] = np.cumsum(is_new_rank)
+        if rank[suffix_array[-1]] == size - 1:
+            # All suffixes have unique ranks, so they are sorted.
+            break
+        length <<= 1
+    return suffix_array
+
+
+def build_lcp_array(sequence: np.ndarray, suffix_array: np.ndarray) -> np.ndarray:
+    """Returns array, which i-th element is the length of the longest common prefix of suffixes suffix_array[i - 1] and suffix_array[i].
+    First element is 0. Kasai algorithm is used, so it works in O(n)."""
+    size = len(sequence)
+    tokens = sequence.tolist()
+    suffixes = suffix_array.tolist()
+    ranks = [0] * size
+    for rank, suffix in enumerate(suffixes):
+        ranks[suffix] = rank
+
+    lcp = [0] * size
+    common_length = 0
+    for suffix in range(size):
+        rank = ranks[suffix]
+        if rank == 0:
+            common_length = 0
+            continue
+        previous_suffix = suffixes[rank - 1]
+        while (
+            suffix + common_length < size
+            and previous_suffix + common_length < size
+            and tokens[suffix + common_length] == tokens[previous_suffix + common_length]
+        ):
+            common_length += 1
+        lcp[rank] = common_length
+        if common_length:
+            common_length -= 1
+    return np.array(lcp, dtype=np.int64)
@@ -0,0 +1,131 @@
+import heapq
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+from .tiles_manager import TilesManager
+from .suffix_array import build_suffix_array, build_lcp_array
+from .similarity_bound import maximal_similarity
+
+RKR_GST_ENGINE = "rkr"
+SUFFIX_ARRAY_GST_ENGINE = "suffix_array"
+
+
+class LcpInterval:
+    """Suffixes of both sequences in an interval of suffix array, which share lcp tokens, grouped by the token preceding them."""
+
+    def __init__(self, lcp: int) -> None:
+        self.lcp = lcp
+        self.pattern_suffixes: Dict[int, List[int]] = {}
+        self.text_suffixes: Dict[int, List[int]] = {}
+        self.size = 0
+
+
+def __merge_intervals__(parent: LcpInterval, child: LcpInterval) -> Iterator[Tuple[int, int]]:
+    """Moves suffixes of child interval to its parent and yields (pattern position, text position) of pairs of suffixes from both of them,
+    which are preceded by different tokens. Their longest common prefix is lcp of parent and it cannot be extended to the left.
+    Only non-empty groups are kept, so every checked combination of groups yields at least one pair (except groups of the same token)."""
+    for pattern_groups, text_groups in [(parent.pattern_suffixes, child.text_suffixes), (child.pattern_suffixes, parent.text_suffixes)]:
+        for text_token, text_suffixes in text_groups.items():
+            for pattern_token, pattern_suffixes in pattern_groups.items():
+                if pattern_token != text_token:
+                    yield from ((pattern_idx, text_idx) for pattern_idx in pattern_suffixes for text_idx in text_suffixes)
+
+    # Smaller interval is merged into the bigger one, so every suffix is moved O(log n) times.
+    if parent.size < child.size:
+        parent.pattern_suffixes, child.pattern_suffixes = child.pattern_suffixes, parent.pattern_suffixes
+        parent.text_suffixes, child.text_suffixes = child.text_suffixes, parent.text_suffixes
+    parent.size += child.size
+    for parent_groups, child_groups in [(parent.pattern_suffixes, child.pattern_suffixes), (parent.text_suffixes, child.text_suffixes)]:
+        for token, suffixes in child_groups.items():
+            if token in parent_groups:
+                parent_groups[token].extend(suffixes)
+            else:
+                parent_groups[token] = suffixes
+
+
+def find_maximal_matches(pattern: TilesManager, text: TilesManager, minimal_search_length: int) -> Iterator[Tuple[int, int, int]]:
+    """Yields (pattern position, text position, length) of all maximal exact matches, which are at least minimal_search_length long.
+    Match is maximal, if it cannot be extended neither to the left nor to the right.
+
+    Both sequences are joined with an unique separator, so common prefixes of suffixes never cross the border between them.
+    Intervals of suffix array, which share at least minimal_search_length tokens, are visited bottom-up using a stack. Suffixes of different
+    child intervals are matched only when intervals are merged and only if they are preceded by different tokens, so time is linear
+    (up to the logarithmic factor of merging) plus the number of matches, even for periodic sequences."""
+    separator = np.array([0], dtype=np.int64)
+    sequence = np.concatenate([pattern.tokens.astype(np.int64) + 1, separator, text.tokens.astype(np.int64) + 1])
+    suffix_array = build_suffix_array(sequence)
+    lcp = build_lcp_array(sequence, suffix_array).tolist()
+    suffixes = suffix_array.tolist()
+    tokens = sequence.tolist()
+    text_offset = pattern.size + 1
+
+    # Intervals sharing less than minimal_search_length tokens are kept empty - their suffixes cannot form any match.
+    stack = [LcpInterval(0)]
+    for rank, suffix in enumerate(suffixes):
+        # Interval of a single suffix. First token of the pattern is not preceded by any token (-1), first token of the text by the separator.
+        current = LcpInterval(len(tokens) - suffix)
+        preceding_token = tokens[suffix - 1] if suffix else -1
+        if suffix < pattern.size:
+            current.pattern_suffixes[preceding_token] = [suffix]
+        elif suffix > pattern.size:
+            current.text_suffixes[preceding_token] = [suffix - text_offset]
+        current.size = 1
+
+        next_lcp = lcp[rank + 1] if rank + 1 < len(suffixes) else 0
+        while stack[-1].lcp > next_lcp:
+            parent = stack.pop()
+            if parent.lcp >= minimal_search_length:
+                yield from ((pattern_idx, text_idx, parent.lcp) for pattern_idx, text_idx in __merge_intervals__(parent, current))
+            current = parent
+        if stack[-1].lcp == next_lcp:
+            if next_lcp >= minimal_search_length:
+                yield from ((pattern_idx, text_idx, next_lcp) for pattern_idx, text_idx in __merge_intervals__(stack[-1], current))
+        else:
+            parent = LcpInterval(next_lcp)
+            if next_lcp >= minimal_search_length:
+                parent.pattern_suffixes, parent.text_suffixes, parent.size = current.pattern_suffixes, current.text_suffixes, current.size
+            stack.append(parent)
+
+
+def split_into_unmarked_matches(pattern: TilesManager, text: TilesManager, match: Tuple[int, int, int], minimal_search_length: int):
+    """Yields parts of the match, in which tokens of both sequences are unmarked, and which are at least minimal_search_length long."""
+    pattern_idx, text_idx, length = match
+    is_unmarked = np.zeros(length + 2, dtype=np.int8)
+    is_unmarked[1:-1] = ~pattern.marks[pattern_idx : pattern_idx + length] & ~text.marks[text_idx : text_idx + length]
+    changes = np.diff(is_unmarked)
+    for begin, end in zip(np.flatnonzero(changes == 1).tolist(), np.flatnonzero(changes == -1).tolist()):
+        if end - begin >= minimal_search_length:
+            yield pattern_idx + begin, text_idx + begin, end - begin
+
+
+def suffix_array_gst(pattern: TilesManager, source: TilesManager, minimal_search_length: int, similarity_floor: float = -1) -> Optional[List]:
+    """Exact greedy string tiling: repeatedly marks the longest common substring of unmarked tokens, until it is shorter than minimal_search_length.
+
+    Every common substring lies on a maximal exact match, so all of them are computed once, using suffix array, and kept in a heap ordered by length.
+    If the longest match from the heap overlaps tiles marked in the meantime, it is replaced by its unmarked parts, otherwise it becomes a tile.
+    Hence, there are no passes with growing or shrinking search length and nothing is hashed again. Unlike gst, it finds tiles of all lengths
+    down to minimal_search_length - the last pass of gst uses the shortest of its search lengths, which can be up to twice as long.
+    If similarity_floor is set and it cannot be reached anymore, None is returned."""
+    heap = [(-length, pattern_idx, text_idx) for pattern_idx, text_idx, length in find_maximal_matches(pattern, source, minimal_search_length)]
+    heapq.heapify(heap)
+
+    tiles = []
+    matched_tokens = 0
+    while heap:
+        length, pattern_idx, text_idx = heapq.heappop(heap)
+        length = -length
+        if pattern.count_unmarked_tokens(pattern_idx) >= length and source.count_unmarked_tokens(text_idx) >= length:
+            pattern.mark(pattern_idx, length)
+            source.mark(text_idx, length)
+            tiles.append({"position_of_token_A": pattern_idx, "position_of_token_B": text_idx, "length": length})
+            matched_tokens += length
+            if similarity_floor > 0 and maximal_similarity(pattern, source, minimal_search_length, matched_tokens, overlapping_tiles=False) < similarity_floor:
+                return None
+            continue
+
+        for unmarked_pattern_idx, unmarked_text_idx, unmarked_length in split_into_unmarked_matches(
+            pattern, source, (pattern_idx, text_idx, length), minimal_search_length
+        ):
+            heapq.heappush(heap, (-unmarked_length, unmarked_pattern_idx, unmarked_text_idx))
+
+    return tiles
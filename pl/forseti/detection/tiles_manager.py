@@ -1,21 +1,82 @@
-from typing import List, Optional
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from .karp_rabin import KarpRabinHashes
+from .prepared_sequence import PreparedSequence
 
 
 class TilesManager:
-    def __init__(self, tokens: List, token_to_str) -> None:
-        self.tokens = [token_to_str(token) for token in tokens]
-        self.marks = [False] * len(self.tokens)
-        self.size = len(self.tokens)
+    """Marks of tokens of one sequence in a single comparison pair. Tokens and their hashes come from shared PreparedSequence."""
+
+    def __init__(self, sequence: PreparedSequence) -> None:
+        self.sequence = sequence
+        self.tokens = sequence.tokens
+        self.marks = np.zeros(len(sequence), dtype=np.bool_)
+        self.size = len(sequence)
+        # For every position, index of the first marked/unmarked token at this position or after it (size, if there is no such token).
+        # Both arrays are non-decreasing, which allows to update them with a binary search and a single slice assignment.
+        self.__next_marked = np.full(self.size + 1, self.size, dtype=np.int32)
+        self.__next_unmarked = np.arange(self.size + 1, dtype=np.int32)
+        if sequence.baseline_marks is not None:
+            changes = np.diff(sequence.baseline_marks.astype(np.int8), prepend=0, append=0)
+            for begin, end in zip(np.flatnonzero(changes == 1), np.flatnonzero(changes == -1)):
+                self.mark(int(begin), int(end - begin))
+
+    @property
+    def hashes(self) -> KarpRabinHashes:
+        return self.sequence.hashes
+
+    def mark(self, index: int, length: int) -> None:
+        """Marks tokens in range [index, index + length) and updates indexes of next marked and unmarked tokens."""
+        end = min(index + length, self.size)
+        if index >= end:
+            return
+        self.marks[index:end] = True
+
+        # Tokens before the range, which pointed to a marked token behind its beginning, now point to its beginning.
+        first_to_update = int(np.searchsorted(self.__next_marked[:index], index, side="right"))
+        self.__next_marked[first_to_update:index] = index
+        self.__next_marked[index:end] = np.arange(index, end, dtype=np.int32)
+
+        # Tokens, which pointed to an unmarked token inside the range, now point to the first unmarked token after it.
+        first_to_update = int(np.searchsorted(self.__next_unmarked[:end], index, side="left"))
+        self.__next_unmarked[first_to_update:end] = self.__next_unmarked[end]
+
+    def marks_of_tiles(self) -> np.ndarray:
+        """Returns marks of tokens covered by tiles, without tokens marked as baseline code."""
+        if self.sequence.baseline_marks is None:
+            return self.marks
+        return self.marks & ~self.sequence.baseline_marks
 
     def get_index_of_next_marked_token(self, index: int) -> Optional[int]:
-        for i in range(index, len(self.marks)):
-            if self.marks[i]:
-                return i
-        return None
+        if index >= self.size:
+            return None
+        next_marked = int(self.__next_marked[index])
+        return next_marked if next_marked < self.size else None
 
     def get_index_of_next_unmarked_token(self, index: int) -> Optional[int]:
-        for i in range(index, len(self.marks)):
-            if not self.marks[i]:
-                return i
+        if index >= self.size:
+            return None
+        next_unmarked = int(self.__next_unmarked[index])
+        return next_unmarked if next_unmarked < self.size else None
+
+    def count_unmarked_tokens(self, index: int) -> int:
+        """Returns number of consecutive unmarked tokens starting from index."""
+        if index >= self.size:
+            return 0
+        return int(self.__next_marked[index]) - index
+
+    def unmarked_windows(self, length: int) -> np.ndarray:
+        """Returns ascending positions of all windows of given length, which do not contain any marked token."""
+        if length > self.size or length <= 0:
+            return np.empty(0, dtype=np.int32)
+        positions = np.arange(self.size - length + 1, dtype=np.int32)
+        return positions[self.__next_marked[: self.size - length + 1] >= positions + length]
 
-        return None
+    def unmarked_runs(self, minimal_length: int = 1) -> Iterator[Tuple[int, int]]:
+        """Yields [begin, end) ranges of consecutive unmarked tokens, which are at least minimal_length long."""
+        begin = int(self.__next_unmarked[0])
+        while begin < self.size:
+            end = int(self.__next_marked[begin])
+            if end - begin >= minimal_length:
+                yield begin, end
+            begin = int(self.__next_unmarked[end])
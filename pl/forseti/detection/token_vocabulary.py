@@ -0,0 +1,31 @@
+from typing import Callable, Dict, List
+import numpy as np
+
+from ..token import Token
+
+
+class TokenVocabulary:
+    """Interns string representations of tokens into integer codes.
+
+    One vocabulary should be shared by all sequences of a single detection run,
+    so equal tokens get the same code in every compared code unit."""
+
+    def __init__(self, token_to_str: Callable[[Token], str]) -> None:
+        self.__token_to_str = token_to_str
+        self.__codes: Dict[str, int] = {}
+        self.__strings: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.__codes)
+
+    def encode(self, tokens: List[Token]) -> np.ndarray:
+        codes = self.__codes
+        token_to_str = self.__token_to_str
+        return np.fromiter((codes.setdefault(token_to_str(token), len(codes)) for token in tokens), dtype=np.int32, count=len(tokens))
+
+    def decode(self, codes: np.ndarray) -> List[str]:
+        """Returns string representations of encoded tokens."""
+        if len(self.__strings) != len(self.__codes):
+            self.__strings = sorted(self.__codes, key=self.__codes.get)
+        strings = self.__strings
+        return [strings[code] for code in codes.tolist()]
@@ -0,0 +1,54 @@
+from typing import Iterator, List, Tuple
+import numpy as np
+
+from .tiles_manager import TilesManager
+
+
+class WindowHashIndex:
+    """Hashes of unmarked windows of one length in both sequences of a comparison pair, grouped by hash.
+
+    Index is built once per search length and reused by following gst iterations. Windows which overlap tokens marked later are not removed,
+    they are only invalidated (in O(length of the tile)), so later passes with the same search length do not hash anything again."""
+
+    def __init__(self, pattern: TilesManager, text: TilesManager, search_length: int) -> None:
+        self.search_length = search_length
+        self.__is_invalidated = False
+
+        text_positions = text.unmarked_windows(search_length)
+        text_hashes = text.sequence.window_hashes(search_length)[text_positions]
+        # Stable sort keeps text positions with the same hash in ascending order
+        order = np.argsort(text_hashes, kind="stable")
+        text_hashes = text_hashes[order]
+        self.__text_positions = text_positions[order]
+
+        pattern_positions = pattern.unmarked_windows(search_length)
+        pattern_hashes = pattern.sequence.window_hashes(search_length)[pattern_positions]
+        first = np.searchsorted(text_hashes, pattern_hashes, side="left")
+        last = np.searchsorted(text_hashes, pattern_hashes, side="right")
+        # Only pattern windows having at least one text window with the same hash are kept
+        has_candidates = first < last
+        self.__pattern_positions = pattern_positions[has_candidates]
+        self.__first = first[has_candidates].tolist()
+        self.__last = last[has_candidates].tolist()
+
+        self.__is_pattern_window_valid = np.ones(max(pattern.size - search_length + 1, 0), dtype=np.bool_)
+        self.__is_text_window_valid = np.ones(max(text.size - search_length + 1, 0), dtype=np.bool_)
+
+    def invalidate(self, pattern_idx: int, text_idx: int, length: int) -> None:
+        """Invalidates windows overlapping tokens marked by the tile."""
+        self.__is_pattern_window_valid[max(0, pattern_idx - self.search_length + 1) : pattern_idx + length] = False
+        self.__is_text_window_valid[max(0, text_idx - self.search_length + 1) : text_idx + length] = False
+        self.__is_invalidated = True
+
+    def candidates(self) -> Iterator[Tuple[int, List[int]]]:
+        """Yields (pattern position, ascending text positions) of valid windows with equal hashes."""
+        if not self.__is_invalidated:
+            for i, pattern_idx in enumerate(self.__pattern_positions.tolist()):
+                yield pattern_idx, self.__text_positions[self.__first[i] : self.__last[i]].tolist()
+            return
+
+        for i in np.flatnonzero(self.__is_pattern_window_valid[self.__pattern_positions]).tolist():
+            text_positions = self.__text_positions[self.__first[i] : self.__last[i]]
+            text_positions = text_positions[self.__is_text_window_valid[text_positions]]
+            if len(text_positions):
+                yield int(self.__pattern_positions[i]), text_positions.tolist()
@@ -14,4 +14,16 @@ class DetectionConfig:
     compare_function_names_in_function_calls: bool = True
     distinguish_operators_symbols: bool = True
     n_processors: int = 1
-    ks_condition_value: float = 0.95
+    ks_condition_value: float = -1
+    hashing_method: str = "numpy"
+    gst_engine: str = "rkr"
+    similarity_floor: float = -1
+    candidate_generation: str = "all_pairs"
+    lsh_bands: int = 16
+    lsh_rows: int = 4
+    minhash_kgram_length: int = 4
+    minimal_fingerprints_overlap: float = -1
+    winnowing_kgram_length: int = 5
+    winnowing_window_length: int = 4
+    pair_results_cache_path: str = ""
+    pair_results_cache_size: int = 256 * 1024 * 1024
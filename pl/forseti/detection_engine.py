@@ -1,24 +1,43 @@
+import functools
+import hashlib
+import itertools
 import logging
 import time
 import tqdm
-from typing import List, Dict
-from scipy.spatial import distance
+from typing import Iterable, Iterator, List, Dict, Tuple
 import numpy as np
 
 from .comparison_pair import ComparisonPair
 from .comparison_pairs_generator import ComparisonPairsGenerator
-from .comparison_result import ComparisonResult
+from .minhash_lsh import MinHashLSH
+from .comparison_result import ComparisonResult, CompactComparisonResult
 
 from .code_unit import CodeUnit
-from .detection.gst import gst
+from .detection.gst import gst, get_search_lengths
+from .detection.suffix_array_gst import suffix_array_gst, SUFFIX_ARRAY_GST_ENGINE
 from .detection.tiles_manager import TilesManager
+from .detection.similarity_bound import maximal_similarity_of_tokens
+from .detection.token_vocabulary import TokenVocabulary
+from .detection.prepared_sequence import PreparedSequence
+from .detection.scanpattern import NUMPY_HASHING
+from .detection.baseline import find_baseline_marks
+from .detection.shared_sequence_store import SharedSequenceStore
+from .detection.pair_result_cache import PairResultCache
 
 from .detection_config import DetectionConfig
 from .flatten_code_units import FlattenCodeUnits
+from .winnowing import fingerprints_overlap
 from .token import Token, TokenKind
 from .tokenized_program import TokenizedProgram
 from .unroll_code_units import UnrollCodeUnits
-from .utils.multiprocessing import execute_function_in_multiprocesses
+from .utils.multiprocessing import iterate_function_in_multiprocesses
+
+# Number of comparison pairs generated and filtered at once.
+PAIRS_CHUNK_SIZE = 1 << 16
+# Number of new results of comparison pairs written to the pair results cache at once.
+PAIR_RESULTS_FLUSH_SIZE = 1 << 12
+# Sequences shared by the parent process, attached once by every worker process.
+_shared_sequences: SharedSequenceStore = None
 
 
 class DetectionEngine:
@@ -40,93 +59,353 @@ class DetectionEngine:
         return token_str
 
     @staticmethod
-    def compare_tokens(config_and_comparison_pair):
-        config, comparison_pair = config_and_comparison_pair
-        distinguish_operators_symbols, compare_function_names_in_function_calls, minimal_search_length, initial_search_length = config
-        tokens_a, tokens_b = (comparison_pair.tokens_a, comparison_pair.tokens_b)
+    def below_similarity_floor_result() -> CompactComparisonResult:
+        """Result of a pair, which cannot reach the similarity floor - it does not have any match."""
+        return CompactComparisonResult(np.empty((0, 3), dtype=np.int32), 0, 0, below_similarity_floor=True)
+
+    @staticmethod
+    def identical_sequences_result(comparison_pair: ComparisonPair, sequence: PreparedSequence) -> ComparisonResult:
+        """Result of a pair of identical sequences - a single tile covers both of them."""
+        marks = np.ones(len(sequence), dtype=np.bool_)
+        return ComparisonResult(comparison_pair, [{"position_of_token_A": 0, "position_of_token_B": 0, "length": len(sequence)}], marks, marks)
+
+    @staticmethod
+    def are_sequences_identical(sequence_a: PreparedSequence, sequence_b: PreparedSequence, minimal_search_length: int) -> bool:
+        """Checks, if pair of sequences can be matched by a single tile without comparing them."""
+        return sequence_a is sequence_b and sequence_a.baseline_marks is None and len(sequence_a) >= minimal_search_length
+
+    @staticmethod
+    def attach_shared_sequences(descriptor, search_lengths: List[int]) -> None:
+        """Initializes worker process: attaches to sequences stored in shared memory by the parent process."""
+        global _shared_sequences
+        _shared_sequences = SharedSequenceStore.attach(descriptor, search_lengths)
+
+    @staticmethod
+    def compare_indexed_tokens(index_and_task):
+        """Compares pair of shared sequences and returns result with index of the task, so results can be matched with tasks in any order."""
+        index, (config, index_a, index_b) = index_and_task
+        return index, DetectionEngine.compare_tokens((config, _shared_sequences[index_a], _shared_sequences[index_b]))
+
+    @staticmethod
+    def compare_tokens(config_and_sequences) -> CompactComparisonResult:
+        """Compares pair of sequences. Pairs, which do not reach the similarity floor, are returned without any match."""
+        config, sequence_a, sequence_b = config_and_sequences
+        gst_engine, minimal_search_length, initial_search_length, hashing_method, similarity_floor = config
 
         logging.debug("analyzing comparison pair...")
         start_time = time.process_time()
-        token_to_str = lambda token: DetectionEngine.token_to_str(distinguish_operators_symbols, compare_function_names_in_function_calls, token)
 
-        tiles_a = TilesManager(tokens_a, token_to_str)
-        tiles_b = TilesManager(tokens_b, token_to_str)
-        matches = gst(tiles_a, tiles_b, minimal_search_length, initial_search_length)
+        if similarity_floor > 0 and maximal_similarity_of_tokens(sequence_a.tokens, sequence_b.tokens) < similarity_floor:
+            return DetectionEngine.below_similarity_floor_result()
+
+        tiles_a = TilesManager(sequence_a)
+        tiles_b = TilesManager(sequence_b)
+        if gst_engine == SUFFIX_ARRAY_GST_ENGINE:
+            matches = suffix_array_gst(tiles_a, tiles_b, minimal_search_length, similarity_floor)
+        else:
+            matches = gst(tiles_a, tiles_b, minimal_search_length, initial_search_length, hashing_method, similarity_floor)
+        if matches is None or (similarity_floor > 0 and 2 * sum(tile["length"] for tile in matches) < similarity_floor * (len(sequence_a) + len(sequence_b))):
+            logging.debug(f"abandoned below similarity floor {time.process_time() - start_time} ...")
+            return DetectionEngine.below_similarity_floor_result()
         # matches, marks_a, marks_b = scored_string_tilling(tokens_a, tokens_b, minimal_search_length, compare_function=token_comparison_function)
         # return ComparisonResult(comparison_pair, matches, marks_a, marks_b)
         logging.debug(f"done {time.process_time() - start_time} ...")
-        return ComparisonResult(comparison_pair, matches, tiles_a.marks, tiles_b.marks)
+        return CompactComparisonResult.pack(matches, tiles_a.marks_of_tiles(), tiles_b.marks_of_tiles())
+
+    @staticmethod
+    def kinds_histogram(code_unit: CodeUnit, tokens: List[Token]) -> np.ndarray:
+        """Returns histogram of token kinds computed while flattening or counts it, if code unit was not flattened by FlattenCodeUnits."""
+        if code_unit is not None and code_unit.kinds_histogram is not None:
+            return code_unit.kinds_histogram
+        return np.bincount([token.token_kind.id for token in tokens], minlength=TokenKind.cursor_type_counter)
+
+    @staticmethod
+    def cosine_similarities(pairs: List[ComparisonPair]) -> np.ndarray:
+        """Returns cosine similarities of token kinds histograms of all pairs.
+        Histograms of unique code units are stacked into one normalized matrix, so similarities are just dot products of its rows."""
+        if not pairs:
+            return np.empty(0)
+        code_units = {}
+        for p in pairs:
+            code_units[id(p.tokens_a)] = (p.code_unit_a, p.tokens_a)
+            code_units[id(p.tokens_b)] = (p.code_unit_b, p.tokens_b)
+        rows = {key: row for row, key in enumerate(code_units)}
+        indexes_a = np.array([rows[id(p.tokens_a)] for p in pairs], dtype=np.int64)
+        indexes_b = np.array([rows[id(p.tokens_b)] for p in pairs], dtype=np.int64)
+        histograms = [DetectionEngine.kinds_histogram(code_unit, tokens) for code_unit, tokens in code_units.values()]
 
-    def apply_cos_condition(self, pairs, config: DetectionConfig):
-        filtered_pairs: List[ComparisonPair] = []
+        matrix = np.array(histograms, dtype=np.float64)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms > 0, norms, 1.0)
+        if len(histograms) <= 4096:
+            # Similarities of all code units fit easily in memory, so they are computed using a single matrix product.
+            return (matrix @ matrix.T)[indexes_a, indexes_b]
+        similarities = np.empty(len(pairs))
+        chunk_size = 1 << 16
+        for begin in range(0, len(pairs), chunk_size):
+            end = begin + chunk_size
+            similarities[begin:end] = np.einsum("ij,ij->i", matrix[indexes_a[begin:end]], matrix[indexes_b[begin:end]])
+        return similarities
 
+    def apply_cos_condition(self, pairs: List[ComparisonPair], config: DetectionConfig) -> List[ComparisonPair]:
+        """Skips pairs, which cosine similarity of token kinds histograms is lower than ks_condition_value. Value -1 disables it."""
         if config.ks_condition_value == -1:
-            for p in pairs:
-                a: List[Token] = p.tokens_a
-                b: List[Token] = p.tokens_b
-
-                histogram_a: Dict[TokenKind, int] = dict.fromkeys(TokenKind.cursors_unique_list_of_short_names, 0)
-                histogram_b: Dict[TokenKind, int] = dict.fromkeys(TokenKind.cursors_unique_list_of_short_names, 0)
-
-                for t in a:
-                    if t.token_kind.short_name not in histogram_a:
-                        histogram_a[t.token_kind.short_name] = 0
-                    histogram_a[t.token_kind.short_name] += 1
-
-                for t in b:
-                    if t.token_kind.short_name not in histogram_b:
-                        histogram_b[t.token_kind.short_name] = 0
-                    histogram_b[t.token_kind.short_name] += 1
-                np_a = np.fromiter(histogram_a.values(), dtype=int)
-                np_b = np.fromiter(histogram_b.values(), dtype=int)
-
-                if distance.cosine(np_a, np_b) > config.ks_condition_value:
-                    filtered_pairs.append(p)
-            logging.info(f"({len(pairs)}, {len(filtered_pairs)}) pairs are left after filtering using cosine similarity.")
-        else:
-            filtered_pairs = pairs
+            return pairs
+
+        similarities = DetectionEngine.cosine_similarities(pairs)
+        return [p for p, similarity in zip(pairs, similarities) if similarity >= config.ks_condition_value]
 
-        return filtered_pairs
+    def apply_winnowing_condition(self, pairs: List[ComparisonPair], config: DetectionConfig) -> List[ComparisonPair]:
+        """Skips pairs, which share too small fraction of winnowing fingerprints to contain long enough matches."""
+        if config.minimal_fingerprints_overlap == -1:
+            return pairs
 
-    def __generate_comparison_pairs__(
-        self, tokenized_programs: List[TokenizedProgram], config: DetectionConfig, selected_programs_to_compare: List[str]
-    ) -> List[ComparisonPair]:
+        return [p for p in pairs if fingerprints_overlap(p.code_unit_a.fingerprints, p.code_unit_b.fingerprints) >= config.minimal_fingerprints_overlap]
+
+    def __flatten_programs__(self, tokenized_programs: List[TokenizedProgram], config: DetectionConfig) -> None:
         for tokenized_program in tqdm.tqdm(tokenized_programs):
             if config.unroll_ast:
                 tokenized_program = UnrollCodeUnits.unroll(tokenized_program, config.remove_unrolled_function, config.unroll_only_simple_functions)
-            tokenized_program = FlattenCodeUnits.flatten(tokenized_program)
+            if config.minimal_fingerprints_overlap == -1:
+                tokenized_program = FlattenCodeUnits.flatten(tokenized_program)
+            else:
+                tokenized_program = FlattenCodeUnits.flatten(tokenized_program, config.winnowing_kgram_length, config.winnowing_window_length)
+
+    def __comparison_pairs__(
+        self,
+        comparison_pairs_generator: ComparisonPairsGenerator,
+        tokenized_programs: List[TokenizedProgram],
+        config: DetectionConfig,
+        selected_programs_to_compare: List[str],
+        statistics: Dict[str, int] = None,
+    ) -> Iterator[ComparisonPair]:
+        """Lazily yields comparison pairs, which pass winnowing and cosine conditions. Pairs are generated and filtered in chunks, so they are
+        never kept all at once, and they are the same every time they are iterated. Numbers of generated and left pairs are added to statistics."""
+        pairs = comparison_pairs_generator.generate(tokenized_programs, selected_programs_to_compare)
+        for chunk in iter(lambda: list(itertools.islice(pairs, PAIRS_CHUNK_SIZE)), []):
+            winnowing_pairs = self.apply_winnowing_condition(chunk, config)
+            filtered_pairs = self.apply_cos_condition(winnowing_pairs, config)
+            if statistics is not None:
+                statistics["generated"] += len(chunk)
+                statistics["winnowing"] += len(winnowing_pairs)
+                statistics["cosine"] += len(filtered_pairs)
+            yield from filtered_pairs
+
+    def __mark_baseline_tokens__(
+        self, sequences: List[PreparedSequence], baseline_programs: List[TokenizedProgram], vocabulary: TokenVocabulary, config: DetectionConfig
+    ) -> None:
+        """Marks tokens of sequences, which match baseline (starter) code, so they are not tiled in comparison pairs.
+        Code units of baseline programs are merged into one sequence, separated by a code, which does not occur in any compared sequence."""
+        if not baseline_programs:
+            return
+        self.__flatten_programs__(baseline_programs, config)
+        baseline_tokens = [vocabulary.encode(code_unit.ast) for program in baseline_programs for code_unit in program.code_units]
+        separator = np.array([len(vocabulary)], dtype=np.int32)
+        baseline = PreparedSequence(np.concatenate([part for tokens in baseline_tokens for part in (tokens, separator)]))
+
+        marked_sequences = 0
+        for sequence in tqdm.tqdm(sequences):
+            baseline_marks = find_baseline_marks(
+                sequence, baseline, config.gst_engine, config.minimal_search_length, config.initial_search_length, config.hashing_method
+            )
+            if baseline_marks.any():
+                sequence.baseline_marks = baseline_marks
+                marked_sequences += 1
+        logging.info(f"baseline code was found in {marked_sequences} of {len(sequences)} unique sequences.")
+
+    @staticmethod
+    def sequence_content_hash(sequence: PreparedSequence, vocabulary: TokenVocabulary) -> bytes:
+        """Returns hash of tokens (and baseline marks) of sequence, which does not depend on codes assigned by vocabulary in a single run."""
+        content_hash = hashlib.sha256("\0".join(vocabulary.decode(sequence.tokens)).encode("utf-8", "surrogatepass"))
+        if sequence.baseline_marks is not None:
+            content_hash.update(np.packbits(sequence.baseline_marks).tobytes())
+        return content_hash.digest()
+
+    @staticmethod
+    def get_search_lengths(config: DetectionConfig) -> List[int]:
+        """Returns search lengths, for which hashes of windows are precomputed for every sequence."""
+        if config.gst_engine != SUFFIX_ARRAY_GST_ENGINE and config.hashing_method == NUMPY_HASHING:
+            return get_search_lengths(config.minimal_search_length, config.initial_search_length)
+        return []
+
+    def __prepare_sequences__(
+        self, comparison_pairs: Iterable[ComparisonPair], config: DetectionConfig, baseline_programs: List[TokenizedProgram] = []
+    ) -> Tuple[List[PreparedSequence], Dict[int, int], Dict[Tuple[int, int], int]]:
+        """Prepares sequences of all pairs for comparison. Tokens are encoded using one vocabulary, so token codes are comparable across the whole corpus.
+        Every code unit is prepared only once (encoded and hashed for all configured search lengths), even if it takes part in many pairs.
+        Tokens matched with baseline programs are marked in advance.
+
+        Returns unique sequences, indexes of sequences of code units (by ids of their tokens) and numbers of pairs of every pair of sequences
+        (in order of their first pairs). Pairs themselves are not kept."""
+        token_to_str = functools.partial(DetectionEngine.token_to_str, config.distinguish_operators_symbols, config.compare_function_names_in_function_calls)
+        vocabulary = TokenVocabulary(token_to_str)
+        search_lengths = DetectionEngine.get_search_lengths(config)
+        sequences: List[PreparedSequence] = []
+        index_of_tokens: Dict[int, int] = {}
+        # Code units with identical encoded tokens share one prepared sequence.
+        index_of_sequence: Dict[bytes, int] = {}
+        pairs_of_sequences: Dict[Tuple[int, int], int] = {}
+
+        def prepare(tokens: List[Token]) -> int:
+            if id(tokens) not in index_of_tokens:
+                encoded_tokens = vocabulary.encode(tokens)
+                key = encoded_tokens.tobytes()
+                if key not in index_of_sequence:
+                    index_of_sequence[key] = len(sequences)
+                    sequences.append(PreparedSequence(encoded_tokens, search_lengths))
+                index_of_tokens[id(tokens)] = index_of_sequence[key]
+            return index_of_tokens[id(tokens)]
 
+        for pair in comparison_pairs:
+            key = (prepare(pair.tokens_a), prepare(pair.tokens_b))
+            pairs_of_sequences[key] = pairs_of_sequences.get(key, 0) + 1
+        logging.info(f"{len(sequences)} unique sequences of {len(index_of_tokens)} code units prepared using {len(vocabulary)} unique tokens.")
+        self.__mark_baseline_tokens__(sequences, baseline_programs, vocabulary, config)
+        if config.pair_results_cache_path:
+            for sequence in sequences:
+                sequence.content_hash = DetectionEngine.sequence_content_hash(sequence, vocabulary)
+        return sequences, index_of_tokens, pairs_of_sequences
+
+    def analyze(
+        self,
+        tokenized_programs: List[TokenizedProgram],
+        config: DetectionConfig = DetectionConfig(),
+        selected_programs_to_compare: List[str] = [],
+        baseline_programs: List[TokenizedProgram] = [],
+    ) -> List[ComparisonResult]:
+        """Compares programs. Code matching baseline_programs (e.g. starter code of assignment) is excluded from matches."""
+        return list(self.analyze_stream(tokenized_programs, config, selected_programs_to_compare, baseline_programs))
+
+    def analyze_stream(
+        self,
+        tokenized_programs: List[TokenizedProgram],
+        config: DetectionConfig = DetectionConfig(),
+        selected_programs_to_compare: List[str] = [],
+        baseline_programs: List[TokenizedProgram] = [],
+    ) -> Iterator[ComparisonResult]:
+        """Like analyze, but yields results of comparison pairs (in order of pairs) as soon as they are computed.
+        Pairs are generated lazily twice: first to prepare sequences and unique comparisons, then to fan results out to them."""
+        self.__flatten_programs__(tokenized_programs, config)
         logging.info("generating comparison pairs...")
         tokenized_programs = sorted(tokenized_programs, key=lambda p: p.author)
         comparison_pairs_generator = ComparisonPairsGenerator(
-            config.compare_whole_program, config.max_number_of_differences_in_single_comparison_pair, config.assign_functions_based_on_types
+            config.compare_whole_program,
+            config.max_number_of_differences_in_single_comparison_pair,
+            config.assign_functions_based_on_types,
+            config.candidate_generation,
+            MinHashLSH(config.lsh_bands, config.lsh_rows, config.minhash_kgram_length),
         )
-        pairs = comparison_pairs_generator.generate(tokenized_programs, selected_programs_to_compare)
-
-        return self.apply_cos_condition(pairs, config)
-
-    def analyze(self, tokenized_programs: List[TokenizedProgram], config: DetectionConfig = DetectionConfig(), selected_programs_to_compare: List[str] = []):
-        comparison_pairs: List[ComparisonPair] = self.__generate_comparison_pairs__(tokenized_programs, config, selected_programs_to_compare)
+        statistics = {"generated": 0, "winnowing": 0, "cosine": 0}
+        sequences, index_of_tokens, pairs_of_sequences = self.__prepare_sequences__(
+            self.__comparison_pairs__(comparison_pairs_generator, tokenized_programs, config, selected_programs_to_compare, statistics),
+            config,
+            baseline_programs,
+        )
+        if config.minimal_fingerprints_overlap != -1:
+            logging.info(f"{statistics['generated'] - statistics['winnowing']} of {statistics['generated']} pairs were pruned using winnowing fingerprints.")
+        if config.ks_condition_value != -1:
+            logging.info(f"({statistics['winnowing']}, {statistics['cosine']}) pairs are left after filtering using cosine similarity.")
         if config.compare_whole_program:
             for p in tokenized_programs:
                 merged_code_ast = []
                 for code_unit in p.code_units:
                     merged_code_ast += code_unit.ast
                 p.code_units = [CodeUnit(merged_code_ast)]
-        logging.info(f"analyzing {len(comparison_pairs)} comparison_pairs...")
+        logging.info(f"analyzing {statistics['cosine']} comparison_pairs...")
 
         rkr_gst_config = (
-            config.distinguish_operators_symbols,
-            config.compare_function_names_in_function_calls,
+            config.gst_engine,
             config.minimal_search_length,
             config.initial_search_length,
+            config.hashing_method,
+            config.similarity_floor,
         )
+        # Pairs of the same (deduplicated) sequences are compared only once. Pairs of identical sequences are not compared at all.
+        # Task is just a pair of indexes of sequences, tokens are read from the shared sequence store by worker processes.
+        # Tasks are ordered by their first pair, results of tasks are kept only until they are fanned out to the last pair, which needs them.
+        tasks = []
+        task_of_sequences: Dict[Tuple[int, int], int] = {}
+        remaining_pairs_of_tasks = []
+        identical_pairs = 0
+        for (index_a, index_b), number_of_pairs in pairs_of_sequences.items():
+            if DetectionEngine.are_sequences_identical(sequences[index_a], sequences[index_b], config.minimal_search_length):
+                identical_pairs += number_of_pairs
+            else:
+                task_of_sequences[(index_a, index_b)] = len(tasks)
+                tasks.append((len(tasks), (rkr_gst_config, index_a, index_b)))
+                remaining_pairs_of_tasks.append(number_of_pairs)
+        del pairs_of_sequences
+        logging.info(f"{len(tasks)} unique comparison pairs to compare, {identical_pairs} pairs of identical code units.")
+
+        # Results of tasks found in the persistent cache are not computed again.
+        results_of_tasks: Dict[int, CompactComparisonResult] = {}
+        cache, keys_of_tasks, new_results = None, [], []
+        tasks_to_compute = tasks
+        if config.pair_results_cache_path:
+            cache = PairResultCache(config.pair_results_cache_path, config.pair_results_cache_size)
+            config_hash = repr(rkr_gst_config).encode("utf-8")
+            keys_of_tasks = [
+                hashlib.sha256(sequences[index_a].content_hash + sequences[index_b].content_hash + config_hash).digest() for _, (_, index_a, index_b) in tasks
+            ]
+            cached_results = cache.get_many(keys_of_tasks)
+            results_of_tasks = {index: cached_results[key] for index, key in enumerate(keys_of_tasks) if key in cached_results}
+            tasks_to_compute = [task for task in tasks if task[0] not in results_of_tasks]
+            hit_rate = len(results_of_tasks) / len(tasks) if tasks else 0.0
+            logging.info(f"{len(results_of_tasks)} of {len(tasks)} unique comparison pairs found in pair results cache (hit rate {hit_rate:.1%}).")
+
+        store = None
         if config.n_processors == 1:
-            comparison_results = [DetectionEngine.compare_tokens((rkr_gst_config, pair)) for pair in tqdm.tqdm(comparison_pairs)]
+            task_results = (
+                (index, DetectionEngine.compare_tokens((task_config, sequences[index_a], sequences[index_b])))
+                for index, (task_config, index_a, index_b) in tqdm.tqdm(tasks_to_compute)
+            )
         else:
-            chunksize = int(len(comparison_pairs) / (config.n_processors * 10)) if len(comparison_pairs) > (config.n_processors * 10) else 1
+            chunksize = int(len(tasks_to_compute) / (config.n_processors * 10)) if len(tasks_to_compute) > (config.n_processors * 10) else 1
             chunksize = max([1, chunksize])
-            comparison_results = execute_function_in_multiprocesses(
-                DetectionEngine.compare_tokens, list(zip([rkr_gst_config] * len(comparison_pairs), comparison_pairs)), config.n_processors, 1.0, chunksize
+            store = SharedSequenceStore.create(sequences)
+            task_results = iterate_function_in_multiprocesses(
+                DetectionEngine.compare_indexed_tokens,
+                tasks_to_compute,
+                config.n_processors,
+                1.0,
+                chunksize,
+                DetectionEngine.attach_shared_sequences,
+                (store.descriptor, DetectionEngine.get_search_lengths(config)),
             )
-        return comparison_results
+
+        # Results are fanned out to all pairs, so every pair gets its own result with its own programs.
+        # Tasks are ordered by their first pair, so results of tasks (computed in the same order) are read only when a pair needs them.
+        below_floor = 0
+        number_of_pairs = 0
+        try:
+            for pair in self.__comparison_pairs__(comparison_pairs_generator, tokenized_programs, config, selected_programs_to_compare):
+                number_of_pairs += 1
+                index_a, index_b = index_of_tokens[id(pair.tokens_a)], index_of_tokens[id(pair.tokens_b)]
+                if (index_a, index_b) not in task_of_sequences:
+                    yield DetectionEngine.identical_sequences_result(pair, sequences[index_a])
+                    continue
+                task_index = task_of_sequences[(index_a, index_b)]
+                while task_index not in results_of_tasks:
+                    index, result = next(task_results)
+                    results_of_tasks[index] = result
+                    if cache is not None:
+                        new_results.append((keys_of_tasks[index], result))
+                        if len(new_results) >= PAIR_RESULTS_FLUSH_SIZE:
+                            cache.put_many(new_results)
+                            new_results = []
+                result = results_of_tasks[task_index]
+                remaining_pairs_of_tasks[task_index] -= 1
+                if not remaining_pairs_of_tasks[task_index]:
+                    del results_of_tasks[task_index]
+                below_floor += result.below_similarity_floor
+                yield result.rehydrate(pair)
+        finally:
+            task_results.close()
+            if cache is not None:
+                cache.put_many(new_results)
+                cache.close()
+            if store is not None:
+                store.close()
+                store.unlink()
+        if config.similarity_floor > 0:
+            logging.info(f"{below_floor} of {number_of_pairs} comparison pairs were abandoned below similarity floor {config.similarity_floor}.")
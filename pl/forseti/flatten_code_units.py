@@ -1,5 +1,8 @@
 from typing import List
+import numpy as np
 from .tokenized_program import TokenizedProgram
+from .token import TokenKind
+from .winnowing import winnow
 
 
 class FlattenCodeUnits:
@@ -11,8 +14,13 @@ class FlattenCodeUnits:
         return tokens
 
     @staticmethod
-    def flatten(tokenized_program: TokenizedProgram) -> TokenizedProgram:
+    def flatten(tokenized_program: TokenizedProgram, winnowing_kgram_length: int = -1, winnowing_window_length: int = -1) -> TokenizedProgram:
+        """Flattens ast of every code unit and counts its token kinds. If winnowing parameters are passed, fingerprints of code units are computed too."""
         for code_unit in [code_unit for code_unit in tokenized_program.code_units]:
             code_unit.ast = FlattenCodeUnits.__preorder__(code_unit.ast)
+            token_kinds = np.fromiter((token.token_kind.id for token in code_unit.ast), dtype=np.int32, count=len(code_unit.ast))
+            code_unit.kinds_histogram = np.bincount(token_kinds, minlength=TokenKind.cursor_type_counter)
+            if winnowing_kgram_length > 0:
+                code_unit.fingerprints = winnow(token_kinds, winnowing_kgram_length, winnowing_window_length)
 
         return tokenized_program
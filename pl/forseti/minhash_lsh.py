@@ -0,0 +1,44 @@
+from typing import Dict, List, Set, Tuple
+import numpy as np
+
+from .token import Token
+from .detection.karp_rabin import KarpRabinHashes
+
+
+class MinHashLSH:
+    """Approximate search of similar code units, using MinHash signatures of token kinds k-grams and locality sensitive hashing.
+
+    Signature has bands * rows MinHash values. Two code units become candidates, if all rows of at least one band are equal.
+    Probability of that is 1 - (1 - s^rows)^bands for Jaccard similarity s of their k-grams sets, so more bands increase recall
+    and more rows decrease number of false candidates."""
+
+    def __init__(self, bands: int = 16, rows: int = 4, kgram_length: int = 4, seed: int = 0) -> None:
+        self.__bands = bands
+        self.__rows = rows
+        self.__kgram_length = kgram_length
+        generator = np.random.default_rng(seed)
+        # Parameters of hash functions h(x) = a * x + b (mod 2^64); multipliers have to be odd to be permutations.
+        self.__multipliers = generator.integers(0, 1 << 63, bands * rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.__increments = generator.integers(0, 1 << 63, bands * rows, dtype=np.uint64)
+
+    def signature(self, tokens: List[Token]) -> np.ndarray:
+        """Returns MinHash signature of set of k-grams of token kinds of flattened code unit."""
+        kinds = np.fromiter((token.token_kind.id for token in tokens), dtype=np.int32, count=len(tokens))
+        kgrams = np.unique(KarpRabinHashes(kinds).window_hashes(min(self.__kgram_length, len(kinds))))
+        if not len(kgrams):
+            return np.full(self.__bands * self.__rows, np.iinfo(np.uint64).max, dtype=np.uint64)
+        return (self.__multipliers[:, np.newaxis] * kgrams[np.newaxis, :] + self.__increments[:, np.newaxis]).min(axis=1)
+
+    def candidate_pairs(self, sequences: List[List[Token]]) -> List[Tuple[int, int]]:
+        """Returns sorted pairs (i, j), i < j, of indexes of sequences, which signatures collide in at least one band."""
+        signatures = np.stack([self.signature(tokens) for tokens in sequences]) if sequences else np.empty((0, self.__bands * self.__rows))
+        candidates: Set[Tuple[int, int]] = set()
+        for band in range(self.__bands):
+            buckets: Dict[bytes, List[int]] = {}
+            for index, band_signature in enumerate(signatures[:, band * self.__rows : (band + 1) * self.__rows]):
+                buckets.setdefault(band_signature.tobytes(), []).append(index)
+            for bucket in buckets.values():
+                for i, first in enumerate(bucket):
+                    for second in bucket[i + 1 :]:
+                        candidates.add((first, second))
+        return sorted(candidates)
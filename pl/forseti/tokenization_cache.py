@@ -0,0 +1,53 @@
+import hashlib
+import logging
+from typing import List, Optional, Tuple
+
+from .code_unit import CodeUnit
+from .code_units_serialization import deserialize_code_units, serialize_code_units
+from .token import TokenKind
+from .utils.sqlite_lru_store import SqliteLruStore
+
+# Version of format of cached code units, it must be changed together with code_units_serialization.
+FORMAT_VERSION = 2
+
+
+class TokenizationCache:
+    """Persistent cache of code units of parsed programs, stored in SQLite database.
+
+    Code units are keyed by hash of names and contents of files of program and of configuration of the parser (see
+    CodeParser.configuration_fingerprint), so unchanged programs are not parsed again in later runs. They are stored in compact binary form
+    (see code_units_serialization). If the database grows over max_size bytes, least recently used programs are evicted.
+    """
+
+    def __init__(self, path: str, max_size: int = 256 * 1024 * 1024) -> None:
+        self.__store = SqliteLruStore(path, "code_units", "TEXT", ["data BLOB"], max_size)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(content_hash: str, configuration_fingerprint: str) -> str:
+        key = hashlib.sha256(f"{FORMAT_VERSION}:{TokenKind.cursor_type_counter}:{configuration_fingerprint}:{content_hash}".encode("utf-8"))
+        return key.hexdigest()
+
+    def get_many(self, keys_and_filenames: List[Tuple[str, List[str]]]) -> List[Optional[List[CodeUnit]]]:
+        """Returns cached code units for every (key, filenames of program) pair or None, if the key is not in the cache.
+        Paths of files of cached program are replaced by given filenames."""
+        data_of_keys = self.__store.get_many(dict.fromkeys(key for key, _ in keys_and_filenames))
+        results = [deserialize_code_units(data_of_keys[key][0], filenames) if key in data_of_keys else None for key, filenames in keys_and_filenames]
+        hits = sum(1 for result in results if result is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, entries: List[Tuple[str, List[CodeUnit], List[str]]]) -> None:
+        """Stores (key, code units, filenames of program) entries and evicts least recently used programs, if the cache is too big."""
+        rows = []
+        for key, code_units, filenames in entries:
+            data = serialize_code_units(code_units, filenames)
+            rows.append((key, (data,), len(key) + len(data)))
+        evicted = self.__store.put_many(rows)
+        if evicted:
+            logging.info(f"{evicted} programs evicted from tokenization cache.")
+
+    def close(self) -> None:
+        self.__store.close()
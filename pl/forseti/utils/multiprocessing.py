@@ -2,6 +2,12 @@ from multiprocessing import Pool
 import tqdm
 
 
-def execute_function_in_multiprocesses(func, data, n_processors, mininterval=0.1, chunksize=1):
-    with Pool(processes=n_processors) as pool:
+def execute_function_in_multiprocesses(func, data, n_processors, mininterval=0.1, chunksize=1, initializer=None, initargs=()):
+    with Pool(processes=n_processors, initializer=initializer, initargs=initargs) as pool:
         return list(tqdm.tqdm(pool.imap_unordered(func, data, chunksize=chunksize), total=len(data), mininterval=mininterval))
+
+
+def iterate_function_in_multiprocesses(func, data, n_processors, mininterval=0.1, chunksize=1, initializer=None, initargs=()):
+    """Yields results of func in order of data, as soon as they are computed, so they do not have to be kept all at once."""
+    with Pool(processes=n_processors, initializer=initializer, initargs=initargs) as pool:
+        yield from tqdm.tqdm(pool.imap(func, data, chunksize=chunksize), total=len(data), mininterval=mininterval)
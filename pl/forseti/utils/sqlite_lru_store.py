@@ -0,0 +1,65 @@
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Tuple
+
+
+class SqliteLruStore:
+    """Rows of values keyed by unique keys, stored in a table of SQLite database.
+
+    Every row also stores its size and time of its last use. If total size of rows grows over max_size bytes, least recently used rows are
+    evicted. Columns are definitions of value columns (e.g. "data BLOB"), which are stored between the key and the size.
+    """
+
+    def __init__(self, path: str, table: str, key_type: str, columns: List[str], max_size: int) -> None:
+        self.__table = table
+        self.__columns = ", ".join(column.split()[0] for column in columns)
+        self.__number_of_columns = len(columns)
+        self.__max_size = max_size
+        self.__connection = sqlite3.connect(path)
+        self.__connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (key {key_type} PRIMARY KEY, {', '.join(columns)}, size INTEGER, last_used REAL)")
+        self.__connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used)")
+        self.__connection.commit()
+
+    def get_many(self, keys: Iterable) -> Dict:
+        """Returns tuples of values of given keys and marks them as used. Keys, which are not stored, are skipped."""
+        keys = list(keys)
+        values = {}
+        batch_size = 500
+        for begin in range(0, len(keys), batch_size):
+            batch = keys[begin : begin + batch_size]
+            rows = self.__connection.execute(f"SELECT key, {self.__columns} FROM {self.__table} WHERE key IN ({','.join('?' * len(batch))})", batch)
+            values.update((row[0], row[1:]) for row in rows)
+        now = time.time()
+        self.__connection.executemany(f"UPDATE {self.__table} SET last_used = ? WHERE key = ?", [(now, key) for key in values])
+        self.__connection.commit()
+        return values
+
+    def put_many(self, rows: List[Tuple]) -> int:
+        """Stores (key, tuple of values, size) rows and evicts least recently used rows, if the store is too big.
+        Returns the number of evicted rows."""
+        now = time.time()
+        placeholders = ", ".join("?" * (self.__number_of_columns + 3))
+        self.__connection.executemany(
+            f"INSERT OR REPLACE INTO {self.__table} VALUES ({placeholders})", [(key, *values, size, now) for key, values, size in rows]
+        )
+        self.__connection.commit()
+        return self.__evict__()
+
+    def __evict__(self) -> int:
+        total_size = self.__connection.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.__table}").fetchone()[0]
+        if total_size <= self.__max_size:
+            return 0
+        # Store is shrunk a bit more than necessary, so eviction does not run after every insert.
+        size_to_free = total_size - int(self.__max_size * 0.9)
+        freed_size, keys_to_evict = 0, []
+        for key, size in self.__connection.execute(f"SELECT key, size FROM {self.__table} ORDER BY last_used"):
+            if freed_size >= size_to_free:
+                break
+            freed_size += size
+            keys_to_evict.append((key,))
+        self.__connection.executemany(f"DELETE FROM {self.__table} WHERE key = ?", keys_to_evict)
+        self.__connection.commit()
+        return len(keys_to_evict)
+
+    def close(self) -> None:
+        self.__connection.close()
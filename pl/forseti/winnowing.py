@@ -0,0 +1,22 @@
+import numpy as np
+
+from .detection.karp_rabin import KarpRabinHashes
+
+
+def winnow(token_kinds: np.ndarray, kgram_length: int, window_length: int) -> np.ndarray:
+    """Returns sorted, unique fingerprints of sequence of token kinds, selected by winnowing (like in MOSS).
+
+    From every window of window_length consecutive k-gram hashes the minimal one is selected, so any common substring
+    at least window_length + kgram_length - 1 tokens long shares at least one fingerprint."""
+    kgram_hashes = KarpRabinHashes(token_kinds).window_hashes(min(kgram_length, len(token_kinds)))
+    if len(kgram_hashes) <= window_length:
+        return kgram_hashes.min(keepdims=True) if len(kgram_hashes) else kgram_hashes
+    return np.unique(np.lib.stride_tricks.sliding_window_view(kgram_hashes, window_length).min(axis=1))
+
+
+def fingerprints_overlap(fingerprints_a: np.ndarray, fingerprints_b: np.ndarray) -> float:
+    """Returns fraction of fingerprints of the smaller set, which are also in the other set."""
+    if not len(fingerprints_a) or not len(fingerprints_b):
+        return 0.0
+    common = np.intersect1d(fingerprints_a, fingerprints_b, assume_unique=True)
+    return len(common) / min(len(fingerprints_a), len(fingerprints_b))
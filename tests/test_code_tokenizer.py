@@ -0,0 +1,50 @@
+import pytest
+
+from app.files_scanner import scan_for_files
+from app.programs_reader import read_programs_sets
+from pl.forseti.c_code.ccode_filter import CCodeFilter, CCodeFilterConfig
+from pl.forseti.c_code.ccode_parser import CCodeParser
+from pl.forseti.code_tokenizer import CodeTokenizer
+from pl.forseti.code_units_serialization import serialize_code_units
+
+# Program with cursors of all kinds rejected by CCodeFilter: aliases, structure and function declarations, mixed declarations,
+# compound statements, parent expressions, unexposed expressions, type references, initialization lists and null statements.
+PROGRAM = """
+typedef struct point { int x; int y; } point_t;
+
+int distance(point_t a, point_t b);
+
+int distance(point_t a, point_t b) {
+    int dx = (a.x - b.x) * %d;
+    int dy = (a.y - b.y);
+    ;
+    return dx * dx + dy * dy;
+}
+
+int main(void) {
+    point_t points[2] = {{1, 2}, {3, 4}};
+    long total = 0;
+    for (int i = 0; i < 2; i++) {
+        total += (long)distance(points[i], points[1 - i]);
+    }
+    return (int)total;
+}
+"""
+
+
+def tokenize(path, config: CCodeFilterConfig, n_processors: int):
+    programs = read_programs_sets(scan_for_files([[str(path)]], ["*.c"]))
+    tokenized_programs = CodeTokenizer(CCodeParser(CCodeFilter(config)), n_processors=n_processors).parse_programs(programs)
+    return {program.author: serialize_code_units(program.code_units, program.filenames) for program in tokenized_programs}
+
+
+@pytest.mark.parametrize("filter_enabled", [True, False])
+def test_tokenization_in_many_processes_is_the_same_as_in_one(tmp_path, filter_enabled):
+    for index in range(4):
+        (tmp_path / f"student{index}").mkdir()
+        (tmp_path / f"student{index}" / "main.c").write_text(PROGRAM % index)
+    config = CCodeFilterConfig(*([filter_enabled] * 6))
+
+    tokenized_in_one_process = tokenize(tmp_path, config, 1)
+    assert len(tokenized_in_one_process) == 4
+    assert tokenize(tmp_path, config, 2) == tokenized_in_one_process
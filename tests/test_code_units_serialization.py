@@ -0,0 +1,97 @@
+from typing import List
+
+from pl.forseti.code_unit import CodeUnit
+from pl.forseti.code_units_serialization import (
+    deserialize_code_units,
+    deserialize_tokenized_programs,
+    load_tokenized_programs,
+    save_tokenized_programs,
+    serialize_code_units,
+    serialize_tokenized_programs,
+)
+from pl.forseti.token import Location, Token, TokenKind, VariableTokenKind
+from pl.forseti.tokenized_program import TokenizedProgram
+
+
+def token(name: str, kind: TokenKind, location: Location, children: List[Token] = [], type_name: str = "", variable_kind: VariableTokenKind = None) -> Token:
+    parent = Token(name, type_name, kind, variable_kind, location, list(children))
+    for child in children:
+        child.parent_token = parent
+    return parent
+
+
+def program(author: str, path: str) -> TokenizedProgram:
+    function = token(
+        "main",
+        TokenKind.FunctionDecl,
+        Location(path, 1, 1),
+        [
+            token("p", TokenKind.VariableDecl, Location(path, 2, 5), [], "char *", VariableTokenKind.Pointer),
+            token("c", TokenKind.VariableDecl, Location(path, 3, 5), [], "char", VariableTokenKind.Char),
+            token(
+                "+",
+                TokenKind.BinaryOp,
+                None,
+                [token("1", TokenKind.NumericLiteral, Location(path, 4, 12)), token("zażółć", TokenKind.StringLiteral, None)],
+                "int",
+                VariableTokenKind.Numeric,
+            ),
+        ],
+        "int (void)",
+        VariableTokenKind.NoType,
+    )
+    alias = token("size", TokenKind.Alias, Location(path, 6, 1), [], "unsigned long", VariableTokenKind.Numeric)
+    return TokenizedProgram([CodeUnit(function), CodeUnit(alias)], ["int main(void) {", "}"], [path], author)
+
+
+def assert_same_tokens(expected: Token, actual: Token, expected_paths: dict = {}) -> None:
+    assert actual.name == expected.name
+    assert actual.type_name == expected.type_name
+    assert actual.token_kind is expected.token_kind
+    assert actual.variable_token_kind is expected.variable_token_kind
+    if expected.location is None:
+        assert actual.location is None
+    else:
+        assert actual.location == Location(expected_paths.get(expected.location.path, expected.location.path), expected.location.line, expected.location.column)
+    assert len(actual.children) == len(expected.children)
+    for expected_child, actual_child in zip(expected.children, actual.children):
+        assert actual_child.parent_token is actual
+        assert_same_tokens(expected_child, actual_child, expected_paths)
+
+
+def assert_same_programs(expected: TokenizedProgram, actual: TokenizedProgram) -> None:
+    assert (actual.author, actual.filenames, actual.raw_codes) == (expected.author, expected.filenames, expected.raw_codes)
+    assert len(actual.code_units) == len(expected.code_units)
+    for expected_code_unit, actual_code_unit in zip(expected.code_units, actual.code_units):
+        assert actual_code_unit.ast.parent_token is None
+        assert_same_tokens(expected_code_unit.ast, actual_code_unit.ast)
+
+
+def test_tokenized_programs_round_trip():
+    programs = [program("student0", "/a/main.c"), program("student1", "/b/main.c"), TokenizedProgram([], [], [], "empty")]
+
+    restored_programs = deserialize_tokenized_programs(serialize_tokenized_programs(programs))
+
+    assert len(restored_programs) == len(programs)
+    for expected, actual in zip(programs, restored_programs):
+        assert_same_programs(expected, actual)
+
+
+def test_saved_tokenized_programs_are_loaded(tmp_path):
+    programs = [program("student0", "/a/main.c"), program("student1", "/b/main.c")]
+    path = str(tmp_path / "programs.bin")
+
+    save_tokenized_programs(path, programs)
+
+    for expected, actual in zip(programs, load_tokenized_programs(path)):
+        assert_same_programs(expected, actual)
+
+
+def test_code_units_round_trip_with_replaced_filenames():
+    expected = program("student0", "/a/main.c")
+
+    code_units = deserialize_code_units(serialize_code_units(expected.code_units, expected.filenames), ["/copy/main.c"])
+
+    assert len(code_units) == len(expected.code_units)
+    for expected_code_unit, actual_code_unit in zip(expected.code_units, code_units):
+        assert_same_tokens(expected_code_unit.ast, actual_code_unit.ast, {"/a/main.c": "/copy/main.c"})
@@ -0,0 +1,31 @@
+import pytest
+
+from app.files_scanner import scan_for_baseline_files
+
+
+def test_baseline_can_be_a_single_file(tmp_path):
+    starter = tmp_path / "starter.c"
+    starter.write_text("int main(void) { return 0; }")
+
+    assert scan_for_baseline_files([[str(starter)]], ["*.c"]) == [[str(starter)]]
+
+
+def test_baseline_files_and_directories_are_resolved_separately(tmp_path):
+    for name in ["a", "b"]:
+        (tmp_path / "starters" / name).mkdir(parents=True)
+        (tmp_path / "starters" / name / "main.c").write_text("int main(void) { return 0; }")
+    header = tmp_path / "starter.h"
+    header.write_text("int f(void);")
+    source = tmp_path / "starter.c"
+    source.write_text("int f(void) { return 1; }")
+
+    scanned_paths = scan_for_baseline_files([[str(tmp_path / "starters"), str(header), str(source)]], ["*.c"])
+
+    assert sorted(scanned_paths) == sorted(
+        [[str(tmp_path / "starters" / "a" / "main.c")], [str(tmp_path / "starters" / "b" / "main.c")], [str(header), str(source)]]
+    )
+
+
+def test_missing_baseline_file_is_an_error(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        scan_for_baseline_files([[str(tmp_path / "starter.c")]], ["*.c"])
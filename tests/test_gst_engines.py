@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from pl.forseti.detection.gst import gst
+from pl.forseti.detection.prepared_sequence import PreparedSequence
+from pl.forseti.detection.scanpattern import NUMPY_HASHING, ROLLING_HASHING
+from pl.forseti.detection.suffix_array_gst import suffix_array_gst
+from pl.forseti.detection.tiles_manager import TilesManager
+
+
+def tiles_of(engine, sequence_a: PreparedSequence, sequence_b: PreparedSequence, *args):
+    tiles = engine(TilesManager(sequence_a), TilesManager(sequence_b), *args)
+    return sorted((tile["position_of_token_A"], tile["position_of_token_B"], tile["length"]) for tile in tiles)
+
+
+def prepared_sequences(tokens_a: np.ndarray, tokens_b: np.ndarray, rng: np.random.Generator, with_baseline: bool):
+    sequence_a, sequence_b = PreparedSequence(tokens_a.astype(np.int32)), PreparedSequence(tokens_b.astype(np.int32))
+    if with_baseline:
+        sequence_a.baseline_marks = rng.random(len(tokens_a)) < 0.1
+        sequence_b.baseline_marks = rng.random(len(tokens_b)) < 0.1
+    return sequence_a, sequence_b
+
+
+def sequences_with_unique_tokens(rng: np.random.Generator):
+    """Returns a permutation and a sequence built from its shuffled fragments and new tokens, so every token occurs at most once
+    in every sequence. Hence all maximal matches are disjoint and the greedy tiling does not depend on the order of equally long matches."""
+    tokens_a = rng.permutation(200)
+    cuts = np.sort(rng.choice(np.arange(1, len(tokens_a)), size=12, replace=False))
+    fragments = [fragment for fragment in np.split(tokens_a, cuts) if rng.random() < 0.8]
+    fragments += [np.arange(200 + 10 * i, 200 + 10 * i + int(rng.integers(1, 10))) for i in range(len(fragments))]
+    order = rng.permutation(len(fragments))
+    return tokens_a, np.concatenate([fragments[i] for i in order])
+
+
+@pytest.mark.parametrize("with_baseline", [False, True])
+@pytest.mark.parametrize("minimal_search_length", [3, 4, 6, 8])
+def test_suffix_array_gst_finds_the_same_tiles_as_gst(with_baseline, minimal_search_length):
+    """If initial_search_length is minimal_search_length, the last pass of gst searches tiles of minimal_search_length, so gst finds tiles
+    of all lengths, like suffix_array_gst."""
+    rng = np.random.default_rng(minimal_search_length)
+    for _ in range(50):
+        sequence_a, sequence_b = prepared_sequences(*sequences_with_unique_tokens(rng), rng, with_baseline)
+
+        expected_tiles = tiles_of(suffix_array_gst, sequence_a, sequence_b, minimal_search_length)
+
+        for hashing_method in [NUMPY_HASHING, ROLLING_HASHING]:
+            assert tiles_of(gst, sequence_a, sequence_b, minimal_search_length, minimal_search_length, hashing_method) == expected_tiles
+
+
+@pytest.mark.parametrize("with_baseline", [False, True])
+def test_numpy_and_rolling_hashing_find_the_same_tiles(with_baseline):
+    rng = np.random.default_rng(1)
+    for _ in range(200):
+        tokens_a, tokens_b = rng.integers(0, 4, int(rng.integers(1, 100))), rng.integers(0, 4, int(rng.integers(1, 100)))
+        if rng.random() < 0.5:
+            tokens_b = np.concatenate([tokens_b[: len(tokens_b) // 2], tokens_a, tokens_b[len(tokens_b) // 2 :]])
+        sequence_a, sequence_b = prepared_sequences(tokens_a, tokens_b, rng, with_baseline)
+        minimal_search_length = int(rng.integers(2, 6))
+        initial_search_length = minimal_search_length * int(rng.integers(1, 4))
+
+        assert tiles_of(gst, sequence_a, sequence_b, minimal_search_length, initial_search_length, NUMPY_HASHING) == tiles_of(
+            gst, sequence_a, sequence_b, minimal_search_length, initial_search_length, ROLLING_HASHING
+        )
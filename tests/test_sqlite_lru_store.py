@@ -0,0 +1,97 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from pl.forseti.code_unit import CodeUnit
+from pl.forseti.comparison_result import CompactComparisonResult
+from pl.forseti.detection.pair_result_cache import PairResultCache
+from pl.forseti.token import Location, Token, TokenKind
+from pl.forseti.tokenization_cache import TokenizationCache
+from pl.forseti.utils import sqlite_lru_store
+from pl.forseti.utils.sqlite_lru_store import SqliteLruStore
+
+
+class Clock:
+    """Strictly increasing time, so order of uses does not depend on resolution of the system clock."""
+
+    def __init__(self) -> None:
+        self.__ticks = itertools.count()
+
+    def time(self) -> float:
+        return float(next(self.__ticks))
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    monkeypatch.setattr(sqlite_lru_store, "time", Clock())
+
+
+def store(path, table: str = "rows", max_size: int = 100) -> SqliteLruStore:
+    return SqliteLruStore(str(path), table, "TEXT", ["data BLOB"], max_size)
+
+
+def test_least_recently_stored_rows_are_evicted(tmp_path):
+    lru_store = store(tmp_path / "store.db")
+    assert lru_store.put_many([(key, (key.encode(),), 30) for key in ["a", "b", "c"]]) == 0
+
+    assert lru_store.put_many([("d", (b"d",), 30)]) == 1
+
+    assert set(lru_store.get_many(["a", "b", "c", "d"])) == {"b", "c", "d"}
+    lru_store.close()
+
+
+def test_store_is_shrunk_to_nine_tenths_of_its_size(tmp_path):
+    lru_store = store(tmp_path / "store.db")
+
+    assert lru_store.put_many([(key, (key.encode(),), 30) for key in ["a", "b", "c", "d", "e"]]) == 2
+
+    assert set(lru_store.get_many(["a", "b", "c", "d", "e"])) == {"c", "d", "e"}
+    lru_store.close()
+
+
+def test_hits_refresh_recency(tmp_path):
+    lru_store = store(tmp_path / "store.db")
+    lru_store.put_many([(key, (key.encode(),), 30) for key in ["a", "b", "c"]])
+
+    assert lru_store.get_many(["a", "missing"]) == {"a": (b"a",)}
+    lru_store.put_many([("d", (b"d",), 30)])
+
+    assert set(lru_store.get_many(["a", "b", "c", "d"])) == {"a", "c", "d"}
+    lru_store.close()
+
+
+def test_stores_sharing_one_file_keep_their_rows(tmp_path):
+    first, second = store(tmp_path / "store.db", "first"), store(tmp_path / "store.db", "second")
+    first.put_many([(key, (b"first",), 30) for key in ["a", "b", "c"]])
+    second.put_many([(key, (b"second",), 30) for key in ["a", "b", "c"]])
+
+    assert second.put_many([("d", (b"second",), 30)]) == 1
+
+    assert first.get_many(["a", "b", "c", "d"]) == {key: (b"first",) for key in ["a", "b", "c"]}
+    assert second.get_many(["a", "b", "c", "d"]) == {key: (b"second",) for key in ["b", "c", "d"]}
+    first.close()
+    second.close()
+
+
+def test_caches_sharing_one_file_keep_their_entries(tmp_path):
+    path = str(tmp_path / "caches.db")
+    tokenization_cache, pair_result_cache = TokenizationCache(path), PairResultCache(path)
+    code_units = [CodeUnit(Token("main", "int (void)", TokenKind.FunctionDecl, None, Location("/a/main.c", 1, 1)))]
+    result = CompactComparisonResult(np.array([[0, 1, 8]], dtype=np.int32), 8, 8, np.packbits(np.ones(9, dtype=np.bool_)), None, False)
+    tokenization_cache.put_many([("program", code_units, ["/a/main.c"])])
+    pair_result_cache.put_many([(b"pair", result)])
+    tokenization_cache.close()
+    pair_result_cache.close()
+
+    tokenization_cache, pair_result_cache = TokenizationCache(path), PairResultCache(path)
+    [cached_code_units] = tokenization_cache.get_many([("program", ["/b/main.c"])])
+    cached_result = pair_result_cache.get_many([b"pair", b"other"])[b"pair"]
+
+    assert [(code_unit.ast.name, code_unit.ast.location.path) for code_unit in cached_code_units] == [("main", "/b/main.c")]
+    assert cached_result.tiles.tolist() == [[0, 1, 8]]
+    assert (cached_result.marked_tokens_a, cached_result.marked_tokens_b) == (8, 8)
+    assert cached_result.packed_marks_a.tolist() == result.packed_marks_a.tolist() and cached_result.packed_marks_b is None
+    assert (pair_result_cache.hits, pair_result_cache.misses) == (1, 1)
+    tokenization_cache.close()
+    pair_result_cache.close()